@@ -0,0 +1,148 @@
+"""
+Per-row notebook cleaning functions vs project/backend/model/cleaning.py
+on a synthetic listings frame. Every step must give identical results.
+
+Run from the repo root: python benchmarks/bench_cleaning.py [--rows 1000000]
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "project", "backend", "model"))
+
+import cleaning
+
+
+# The per-row versions from real_estates.ipynb / recommender.ipynb
+def extract_amount(value):
+    value = re.sub(r"[₦,]", "", value)
+    amount = re.search(r"\d+", value)
+    return int(amount.group()) if amount else None
+
+
+def clean_location(value):
+    match = re.match(r"(.+?)\s*\((.*?)\),?\s*(.+)", value)
+    if match:
+        return f"{match.group(3)}, {match.group(1)}"
+    return value
+
+
+def clean_location_recommender(value):
+    value = str(value)
+    value = value.replace("...", "").strip()
+    match = re.match(r"(.+?)\s*\((.*?)\),?\s*(.+)", value)
+    if match:
+        return f"{match.group(3)}, {match.group(1)}"
+    return value
+
+
+def clean_furnishing(value):
+    valid_furnishings = {"Furnished", "Unfurnished", "Semi-Furnished"}
+    return value if value in valid_furnishings else "Unknown"
+
+
+def convert_bedrooms_bathrooms(value):
+    if isinstance(value, str) and "more than" in value:
+        number = int(value.split()[-1])
+        return number + 1
+    return int(value)
+
+
+def clean_text(value):
+    value = str(value)
+    value = value.replace("\n", " ").replace("...", "")
+    value = re.sub(r"[^a-zA-Z0-9\s]", "", value)
+    return " ".join(value.split())
+
+
+def synthetic_listings(rows, seed=42):
+    rng = np.random.default_rng(seed)
+    areas = [f"Area {i}" for i in range(400)]
+    cities = ["Lagos", "Abuja", "Rivers", "Oyo", "Ogun"]
+    locations = [f"{a} ({d}), {c}" for a in areas[:200] for d, c in (("Phase 1", "Lagos"), ("Gwarinpa", "Abuja"))]
+    locations += [f"{a}, {c}" for a in areas[200:] for c in cities] + ["Lekki..."]
+    prices = [f"₦ {p:,}" for p in rng.integers(1, 5000, 20_000) * 50_000] + ["Contact for price", "₦ 250,000 per annum"]
+    texts = [f"Newly built {b} bedroom flat... with BQ & parking!\n#{i}" for i, b in enumerate(rng.integers(1, 6, 50_000))]
+
+    return pd.DataFrame({
+        "price": rng.choice(prices, rows),
+        "location": rng.choice(locations, rows),
+        "furnishing": rng.choice(["Furnished", "Unfurnished", "Semi-Furnished", "N/A"], rows),
+        "sqm": rng.choice(["500", "1200", "", "abc", "320.5"], rows),
+        "bedrooms": rng.choice(["1", "2", "3", "4", "5", "more than 10"], rows),
+        "bathrooms": rng.choice(["1", "2", "3", "more than 10"], rows),
+        "description": rng.choice(texts, rows),
+    })
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def same_values(expected, actual):
+    # Values only: dtypes may differ (e.g. object vs categorical), NaN == NaN
+    expected, actual = pd.DataFrame(expected), pd.DataFrame(actual)
+    try:
+        pd.testing.assert_frame_equal(
+            pd.DataFrame(expected.to_numpy(dtype=object)),
+            pd.DataFrame(actual.to_numpy(dtype=object)),
+            check_dtype=False,
+        )
+        return True
+    except AssertionError:
+        return False
+
+
+def compare(name, per_row, vectorized):
+    expected, row_seconds = timed(per_row)
+    actual, vec_seconds = timed(vectorized)
+    same = same_values(pd.Series(expected), actual)
+    print(f"  {name:<28} {row_seconds:7.2f}s -> {vec_seconds:6.2f}s  x{row_seconds / vec_seconds:6.1f}  [{'ok' if same else 'MISMATCH'}]")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    df = synthetic_listings(args.rows)
+    print(f"{args.rows:,} rows: per-row -> vectorized")
+
+    compare("extract_amount", lambda: [extract_amount(s) for s in df["price"]], lambda: cleaning.extract_amount(df["price"]))
+    compare("clean_location", lambda: df["location"].apply(clean_location), lambda: cleaning.clean_location(df["location"]))
+    compare("clean_location (recommender)", lambda: df["location"].apply(clean_location_recommender),
+            lambda: cleaning.clean_location(df["location"], strip_ellipsis=True))
+    compare("clean_furnishing", lambda: df["furnishing"].apply(clean_furnishing), lambda: cleaning.clean_furnishing(df["furnishing"]))
+    compare("convert_bedrooms_bathrooms", lambda: df["bedrooms"].apply(convert_bedrooms_bathrooms),
+            lambda: cleaning.convert_bedrooms_bathrooms(df["bedrooms"]))
+    compare("clean_text", lambda: df["description"].apply(clean_text), lambda: cleaning.clean_text(df["description"]))
+
+    def per_row_pipeline():
+        out = df.copy()
+        out["converted_prices"] = [extract_amount(s) for s in out["price"]]
+        out["location"] = out["location"].apply(clean_location)
+        out["furnishing"] = out["furnishing"].apply(clean_furnishing)
+        out["sqm"] = pd.to_numeric(out["sqm"], errors="coerce")
+        out["converted_prices"] = pd.to_numeric(out["converted_prices"], errors="coerce")
+        out = out.dropna(subset=["sqm", "converted_prices"])
+        out["sqm"] = out["sqm"].replace({'': None}).astype(float).fillna(0).astype(int)
+        out["bedrooms"] = out["bedrooms"].apply(convert_bedrooms_bathrooms)
+        out["bathrooms"] = out["bathrooms"].apply(convert_bedrooms_bathrooms)
+        return out
+
+    expected, row_seconds = timed(per_row_pipeline)
+    actual, vec_seconds = timed(lambda: cleaning.clean_listings(df))
+    columns = ["converted_prices", "location", "furnishing", "sqm", "bedrooms", "bathrooms"]
+    same = same_values(expected[columns], actual[columns])
+    print(f"  {'clean_listings (pipeline)':<28} {row_seconds:7.2f}s -> {vec_seconds:6.2f}s  x{row_seconds / vec_seconds:6.1f}  [{'ok' if same else 'MISMATCH'}]")
+
+
+if __name__ == "__main__":
+    main()
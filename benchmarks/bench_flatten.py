@@ -0,0 +1,167 @@
+"""
+Flattening synthetic adverts the way the scrapers write them.
+
+CSV: through RotatingCsvWriter in flush batches, comparing the old per-ad
+if/elif loop, flatten_adverts turned back into records, and
+houses.flatten_ads (a per-advert loop too: the columnar pass only pays off
+when the consumer wants a table). The CSV files must come out identical.
+
+Parquet: through ParquetDatasetWriter, comparing the loop + DataFrame(rows)
+with houses.flatten_ads_table (flatten_adverts), both typed the same way.
+The datasets must read back identical. Some adverts carry numeric
+attribute values, as the API sometimes sends them.
+
+Run from the repo root: python benchmarks/bench_flatten.py [--adverts 100000]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from utils.flatten import flatten_adverts
+from utils.storage import ParquetDatasetWriter, RotatingCsvWriter, read_listings
+from project.backend.houses import ATTRS, FIELDNAMES, FIELDS, flatten_ads, flatten_ads_table, listings_table, parquet_schema
+
+CRAWL_DATE = pd.Timestamp("2025-03-01").date()
+
+
+def synthetic_adverts(count, seed=42):
+    rng = random.Random(seed)
+    noise = ["Parking Space", "Facilities", "Condition", "Toilets", "Property use"]
+    adverts = []
+    for i in range(count):
+        attrs = [
+            {"name": "Property size", "value": rng.randint(50, 900) if i % 5 == 0 else str(rng.randint(50, 900))},
+            {"name": "Bedrooms", "value": rng.choice(["1", "2", "3", "4", "more than 10"])},
+            {"name": "Bathrooms", "value": str(rng.randint(1, 6))},
+            {"name": "Furnishing", "value": rng.choice(["Furnished", "Unfurnished", "Semi-Furnished"])},
+        ]
+        attrs += [{"name": name, "value": "x"} for name in rng.sample(noise, rng.randint(0, 3))]
+        rng.shuffle(attrs)
+        # Some adverts miss attributes entirely
+        adverts.append({
+            "id": 40_000_000 + i,
+            "title": f"{rng.randint(1, 5)} bedroom flat for rent",
+            "price_title": f"₦ {rng.randint(1, 900) * 100_000:,}",
+            "region": rng.choice(["Lekki, Lagos", "Asokoro, Abuja", "Ikeja, Lagos"]),
+            "short_description": "Newly built",
+            "status": "active",
+            "attrs": attrs if i % 17 else attrs[:1],
+        })
+    return adverts
+
+
+def flatten_per_ad(adverts):
+    # The if/elif loop houses.py used before utils.flatten
+    rows = []
+    for ad in adverts:
+        property_size = bedrooms = furnishing = bathrooms = "N/A"
+        for attr in ad.get("attrs", []):
+            if attr['name'] == 'Property size':
+                property_size = attr.get('value', 'N/A')
+            elif attr['name'] == 'Bedrooms':
+                bedrooms = attr.get('value', 'N/A')
+            elif attr['name'] == 'Furnishing':
+                furnishing = attr.get('value', 'N/A')
+            elif attr['name'] == 'Bathrooms':
+                bathrooms = attr.get('value', 'N/A')
+        rows.append({
+            "id": ad.get("id"),
+            "title": ad.get("title", "N/A"),
+            "price": ad.get("price_title", "N/A"),
+            "location": ad.get("region", "N/A"),
+            "property_size": property_size,
+            "bedrooms": bedrooms,
+            "furnishing": furnishing,
+            "bathrooms": bathrooms,
+            "description": ad.get("short_description", "N/A"),
+            "status": ad.get("status", "N/A"),
+        })
+    return rows
+
+
+def flatten_columnar(adverts):
+    # Build the whole table with flatten_adverts and turn it back into records
+    return flatten_adverts(adverts, FIELDS, ATTRS, "N/A")[FIELDNAMES].to_dict("records")
+
+
+def table_per_ad(adverts):
+    # The loop's records as the table the Parquet writer needs
+    return listings_table(pd.DataFrame(flatten_per_ad(adverts), dtype=object), CRAWL_DATE)
+
+
+def table_columnar(adverts):
+    return flatten_ads_table(adverts, CRAWL_DATE)
+
+
+def write_parquet(transform, adverts, directory, batch_size):
+    with ParquetDatasetWriter(directory, parquet_schema(), batch_size=batch_size, run_id="bench", transform=transform) as writer:
+        for start in range(0, len(adverts), batch_size):
+            writer.write_rows(adverts[start:start + batch_size])
+    return read_listings(directory, parquet_schema()).sort_values("id", ignore_index=True)
+
+
+def write_csv(transform, adverts, directory, batch_size):
+    # The scraper's path: raw adverts go through RotatingCsvWriter, which flattens each flush batch
+    with RotatingCsvWriter(directory, "data", FIELDNAMES, batch_size=batch_size, run_id="bench", transform=transform) as writer:
+        for start in range(0, len(adverts), batch_size):
+            writer.write_rows(adverts[start:start + batch_size])
+    contents = []
+    for path in writer.files:
+        with open(path, encoding="utf-8") as file:
+            contents.append(file.read())
+    return "".join(contents)
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--adverts", type=int, default=100_000)
+    parser.add_argument("--batch-size", type=int, default=500, help="RotatingCsvWriter flush batch, as in the scrapers")
+    parser.add_argument("--parquet-batch-size", type=int, default=5000, help="ParquetDatasetWriter flush batch, as in the scrapers")
+    args = parser.parse_args()
+
+    adverts = synthetic_adverts(args.adverts)
+    print(f"{args.adverts} adverts, CSV written in batches of {args.batch_size}")
+
+    variants = [("per-ad if/elif loop", flatten_per_ad), ("flatten_adverts + to_dict", flatten_columnar), ("flatten_ads (CSV path)", flatten_ads)]
+    expected, baseline = None, None
+    for name, transform in variants:
+        with tempfile.TemporaryDirectory() as directory:
+            output, seconds = timed(write_csv, transform, adverts, directory, args.batch_size)
+        expected = expected if expected is not None else output
+        baseline = baseline or seconds
+        status = "ok" if output == expected else "MISMATCH"
+        print(f"  {name:<27} {seconds:7.3f}s  {args.adverts / seconds:10,.0f} ads/s  x{baseline / seconds:.2f}  [{status}]")
+
+    print(f"Parquet written in batches of {args.parquet_batch_size}")
+    variants = [("per-ad loop + DataFrame", table_per_ad), ("flatten_ads_table", table_columnar)]
+    expected, baseline = None, None
+    for name, transform in variants:
+        with tempfile.TemporaryDirectory() as directory:
+            output, seconds = timed(write_parquet, transform, adverts, directory, args.parquet_batch_size)
+        expected = expected if expected is not None else output
+        baseline = baseline or seconds
+        status = "ok" if output.equals(expected) else "MISMATCH"
+        print(f"  {name:<27} {seconds:7.3f}s  {args.adverts / seconds:10,.0f} ads/s  x{baseline / seconds:.2f}  [{status}]")
+
+    # Flattening alone, without the writers
+    batches = [adverts[start:start + args.parquet_batch_size] for start in range(0, len(adverts), args.parquet_batch_size)]
+    for name, transform in variants:
+        _, seconds = timed(lambda: [transform(batch) for batch in batches])
+        print(f"  {name + ' (flatten only)':<40} {seconds:7.3f}s")
+
+
+if __name__ == "__main__":
+    main()
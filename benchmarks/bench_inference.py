@@ -0,0 +1,107 @@
+"""
+Single-row and batch latency of the price model: the current
+pydantic -> model_dump -> DataFrame -> model.predict path vs
+project/backend/inference.py's FlatForest on the same inputs.
+Predictions must match within floating-point tolerance.
+
+Uses --model if given, otherwise fits the app's RandomForestRegressor
+(100 trees) on synthetic listings.
+
+Run from the repo root: python benchmarks/bench_inference.py [--model project/backend/model/price_prediction_model.pkl]
+"""
+import argparse
+import os
+import sys
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel
+from sklearn.ensemble import RandomForestRegressor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "project", "backend"))
+
+from inference import FlatForest
+
+FEATURES = ["location_code", "sqm", "bathrooms", "bedrooms", "furnishing_code"]
+
+
+# Same fields as app.PropertyInput; importing app would load the model from ./model
+class PropertyInput(BaseModel):
+    location_code: int
+    sqm: float
+    bathrooms: int
+    bedrooms: int
+    furnishing_code: int
+
+
+def synthetic_features(rows, seed=42):
+    rng = np.random.default_rng(seed)
+    X = np.column_stack([
+        rng.integers(0, 600, rows),
+        rng.integers(20, 3000, rows),
+        rng.integers(1, 8, rows),
+        rng.integers(1, 8, rows),
+        rng.integers(0, 4, rows),
+    ]).astype(np.float64)
+    y = X[:, 1] * 40_000 * (1 + X[:, 0] % 7) + X[:, 3] * 2_000_000 + rng.normal(0, 5_000_000, rows)
+    return X, y
+
+
+def percentiles(fn, inputs):
+    timings = []
+    for item in inputs:
+        start = time.perf_counter()
+        fn(item)
+        timings.append(time.perf_counter() - start)
+    return np.percentile(timings, [50, 99]) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=None, help="Path to a fitted price_prediction_model.pkl")
+    parser.add_argument("--rows", type=int, default=50_000, help="Synthetic training rows when --model isn't given")
+    parser.add_argument("--requests", type=int, default=1000, help="Single-row predictions to time")
+    args = parser.parse_args()
+
+    X, y = synthetic_features(args.rows)
+    if args.model:
+        model = joblib.load(args.model)
+    else:
+        model = RandomForestRegressor(n_estimators=100, random_state=42).fit(pd.DataFrame(X, columns=FEATURES), y)
+
+    start = time.perf_counter()
+    flat = FlatForest.from_model(model)
+    print(f"Flattened {len(flat.roots)} trees / {len(flat.left):,} nodes in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    payloads = [dict(zip(FEATURES, row)) for row in X[:args.requests].astype(int).tolist()]
+
+    def current_path(payload):
+        data = PropertyInput(**payload)
+        return model.predict(pd.DataFrame([data.model_dump()]))[0]
+
+    def flat_path(payload):
+        data = PropertyInput(**payload)
+        return flat.predict(np.array([[getattr(data, name) for name in FEATURES]], dtype=np.float64))[0]
+
+    expected = np.array([current_path(p) for p in payloads[:200]])
+    actual = np.array([flat_path(p) for p in payloads[:200]])
+    print(f"Max abs difference on 200 rows: {np.abs(expected - actual).max():.3g} [{'ok' if np.allclose(expected, actual) else 'MISMATCH'}]")
+
+    print(f"Single row, {len(payloads)} requests:   p50 ms   p99 ms")
+    for name, fn in (("sklearn (current)", current_path), ("FlatForest", flat_path)):
+        p50, p99 = percentiles(fn, payloads)
+        print(f"  {name:<24} {p50:7.3f}  {p99:7.3f}")
+
+    print("Batch:            sklearn ms   FlatForest ms")
+    for size in (10, 100, 1000, 10_000):
+        batch = X[:size]
+        frame = pd.DataFrame(batch, columns=FEATURES)
+        sk_ms = percentiles(lambda _: model.predict(frame), range(5))[0]
+        flat_ms = percentiles(lambda _: flat.predict(batch), range(5))[0]
+        print(f"  {size:>7,} rows     {sk_ms:10.2f}   {flat_ms:13.2f}")
+
+
+if __name__ == "__main__":
+    main()
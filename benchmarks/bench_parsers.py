@@ -0,0 +1,112 @@
+"""
+Pages per second for each HTML parser backend on saved pages.
+
+Put saved listing pages in benchmarks/fixtures/ as property_*.html (main.py
+pages) and cars_*.html (property.py pages). Without fixtures a synthetic
+page of the same shape is used. Every backend must produce the same rows
+as the stdlib "html.parser" baseline.
+
+Run from the repo root: python benchmarks/bench_parsers.py [--repeat 20]
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import util as utils
+from main import LISTING_STRAINER, get_data_from_page
+from property import CAR_STRAINER, get_cars_from_page
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def synthetic_property_page(listings=40):
+    cards = "".join(f"""
+    <div class="property-listing">
+      <a href="/property/{i}"><img src="/img/{i}.jpg" alt=""></a>
+      <h1>Luxury {i % 5 + 1} Bedroom Apartment</h1>
+      <h2>&#8358; {i * 1_250_000:,}</h2>
+      <p>Flat / Apartment</p>
+      <h4>Lekki Phase {i % 2 + 1}, Lekki, Lagos</h4>
+      <ul><li>{200 + i} sqm</li><li>{i % 5 + 1} beds</li></ul>
+      <span>Agent</span><span>Verified</span><span>For Sale</span><span>Residential</span>
+      <div class="listing-added-date">Added {i % 28 + 1} Mar 2025</div>
+    </div>""" for i in range(listings))
+    noise = "".join(f'<div class="ad-slot"><script>var slot{i} = {{}};</script><p>Sponsored {i}</p></div>' for i in range(60))
+    return f"""<html><head><title>Properties</title><script>var config = {{}};</script></head>
+    <body><nav><ul class="pagination">{''.join(f'<li><a href="/for-sale?page={p}">{p}</a></li>' for p in range(1, 11))}</ul></nav>
+    {noise}<main>{cards}</main><footer>{noise}</footer></body></html>"""
+
+
+def synthetic_cars_page(listings=40):
+    cards = "".join(f"""
+    <div class="masonry-item">
+      <div class="b-list-advert-base">
+        <div class="qa-advert-price">&#8358; {i * 850_000:,}</div>
+        <div class="b-list-advert-base__description">Toyota Camry {2005 + i % 15}</div>
+        <div class="b-list-advert-base__description-text">Clean, first body, buy and drive {i}</div>
+        <div class="b-list-advert-base__item-attr">Foreign Used</div>
+        <div class="b-list-advert-base__item-attr">Automatic</div>
+        <div class="b-list-advert__region__text">Ikeja, Lagos</div>
+      </div>
+    </div>""" for i in range(listings))
+    noise = "".join(f'<div class="banner"><script>var b{i} = 1;</script><span>Promo {i}</span></div>' for i in range(60))
+    return f"<html><head><title>Cars</title></head><body>{noise}<div class='masonry'>{cards}</div>{noise}</body></html>"
+
+
+def load_fixtures(pattern, fallback):
+    pages = []
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, pattern))):
+        with open(path, encoding="utf-8") as file:
+            pages.append(file.read())
+    return pages or [fallback()]
+
+
+def available_parsers():
+    parsers = ["html.parser"]
+    for name, module in (("lxml", "lxml"), ("html5lib", "html5lib")):
+        try:
+            __import__(module)
+            parsers.append(name)
+        except ImportError:
+            print(f"Skipping {name}: not installed")
+    return parsers
+
+
+def run(pages, extract, strainer, parser, use_strainer, repeat):
+    results = []
+    start = time.perf_counter()
+    for _ in range(repeat):
+        results = [extract(utils.make_soup(html, parser, strainer if use_strainer else None)) for html in pages]
+    elapsed = time.perf_counter() - start
+    return results, len(pages) * repeat / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    suites = [
+        ("main.get_data_from_page", load_fixtures("property_*.html", synthetic_property_page), get_data_from_page, LISTING_STRAINER),
+        ("property.get_cars_from_page", load_fixtures("cars_*.html", synthetic_cars_page), get_cars_from_page, CAR_STRAINER),
+    ]
+
+    for name, pages, extract, strainer in suites:
+        print(f"\n{name}: {len(pages)} page(s) x {args.repeat}")
+        baseline, _ = run(pages, extract, strainer, "html.parser", False, 1)
+
+        for backend in available_parsers():
+            # html5lib ignores parse_only, so only the full tree is measured for it
+            for use_strainer in ((False,) if backend == "html5lib" else (False, True)):
+                results, pages_per_second = run(pages, extract, strainer, backend, use_strainer, args.repeat)
+                label = f"{backend}{' + strainer' if use_strainer else ''}"
+                status = "ok" if results == baseline else "MISMATCH"
+                print(f"  {label:<24} {pages_per_second:8.1f} pages/s  [{status}]")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+QPS, recall@10, resident memory and size on disk of
+project/backend/model/numpy_store.py (int8, int8 + float re-scoring,
+float16) against a persistent Chroma collection, on synthetic clustered
+embeddings the size of the listings corpus. Recall is measured against
+exact float32 search. QPS is for one query per call; "batch QPS" sends
+every query in a single search_vectors call. Each backend is loaded and
+queried in its own process so its RSS isn't mixed with the others'.
+Chroma is skipped when chromadb isn't installed.
+
+Run from the repo root: python benchmarks/bench_vector_store.py [--docs 25000 --dim 384]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "project", "backend", "model"))
+
+from numpy_store import NumpyVectorStore, normalize_rows, top_k
+
+K = 10
+
+
+def synthetic_embeddings(docs, dim, queries, seed=42):
+    # Listings cluster by area and type, so draw vectors around a few hundred centres
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(300, dim))
+    vectors = centres[rng.integers(0, len(centres), docs)] + rng.normal(scale=0.8, size=(docs, dim))
+    query_vectors = vectors[rng.integers(0, docs, queries)] + rng.normal(scale=0.8, size=(queries, dim))
+    return normalize_rows(vectors), normalize_rows(query_vectors)
+
+
+def memory_mb():
+    try:
+        with open("/proc/self/status") as file:
+            for line in file:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def disk_mb(path):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names) / 2**20
+
+
+def run_backend(backend, workdir):
+    # Child process: load one backend, answer every query one at a time, then all at once, report JSON
+    queries = np.load(os.path.join(workdir, "queries.npy"))
+    start = time.perf_counter()
+
+    if backend == "chroma":
+        import chromadb
+        collection = chromadb.PersistentClient(path=os.path.join(workdir, "chroma")).get_collection("bench")
+
+        def search(query):
+            ids = collection.query(query_embeddings=[query.tolist()], n_results=K)["ids"][0]
+            return [int(i) for i in ids]
+
+        def search_batch(queries):
+            return [[int(i) for i in ids] for ids in collection.query(query_embeddings=queries.tolist(), n_results=K)["ids"]]
+    else:
+        directory, _, mode = backend.partition("+")
+        store = NumpyVectorStore(os.path.join(workdir, directory))
+
+        def search(query):
+            return store.search_vectors(query, K, rescore=mode == "rescore")[0][0].tolist()
+
+        def search_batch(queries):
+            return [indices.tolist() for indices, _ in store.search_vectors(queries, K, rescore=mode == "rescore")]
+
+    search(queries[0])
+    load_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = [search(query) for query in queries]
+    seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batched = search_batch(queries)
+    batch_seconds = time.perf_counter() - start
+    assert batched == results, f"{backend}: batched results differ from one-at-a-time"
+    print(json.dumps({
+        "results": results, "qps": len(queries) / seconds, "batch_qps": len(queries) / batch_seconds,
+        "load": load_seconds, "rss": memory_mb(),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=25_000)
+    parser.add_argument("--dim", type=int, default=384, help="384 for all-MiniLM-L6-v2, 768 for all-mpnet-base-v2")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--backend", help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.backend:
+        run_backend(args.backend, args.workdir)
+        return
+
+    vectors, queries = synthetic_embeddings(args.docs, args.dim, args.queries)
+    truth = [set(top_k(vectors @ query, K).tolist()) for query in queries]
+    ids = [str(i) for i in range(len(vectors))]
+    texts = [f"listing {i}" for i in ids]
+
+    with tempfile.TemporaryDirectory(prefix="bench_vector_store_") as workdir:
+        np.save(os.path.join(workdir, "queries.npy"), queries)
+        # "int8-only" has no float16 re-scoring copy, the smallest store on disk
+        backends = ["int8-only", "int8", "int8+rescore", "float16"]
+        directories = {"int8-only": ("int8", False), "int8": ("int8", True), "float16": ("float16", False)}
+        for directory, (dtype, rescore_copy) in directories.items():
+            NumpyVectorStore.build(os.path.join(workdir, directory), ids, texts, [{}] * len(ids), vectors, dtype, rescore_copy=rescore_copy)
+
+        try:
+            import chromadb
+            collection = chromadb.PersistentClient(path=os.path.join(workdir, "chroma")).get_or_create_collection("bench")
+            for start in range(0, len(ids), 5000):
+                end = start + 5000
+                collection.add(ids=ids[start:end], embeddings=vectors[start:end].tolist(), documents=texts[start:end])
+            backends.append("chroma")
+        except ImportError:
+            print("Skipping Chroma: chromadb isn't installed")
+
+        print(f"{args.docs:,} docs x {args.dim} dims, {args.queries} queries, k={K}")
+        print(f"  {'backend':<14} {'QPS':>8} {'batch QPS':>10} {'recall@10':>10} {'load s':>8} {'RSS MB':>8} {'disk MB':>8}")
+        for backend in backends:
+            output = subprocess.run(
+                [sys.executable, __file__, "--backend", backend, "--workdir", workdir],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            report = json.loads(output.strip().splitlines()[-1])
+            recall = np.mean([len(truth[i] & set(found)) / K for i, found in enumerate(report["results"])])
+            disk = disk_mb(os.path.join(workdir, backend.partition("+")[0]))
+            print(f"  {backend:<14} {report['qps']:8.0f} {report['batch_qps']:10.0f} {recall:10.3f} {report['load']:8.2f} {report['rss']:8.1f} {disk:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,76 +1,113 @@
-import pandas as pd
 import requests
 import time
 import os
+import argparse
+from datetime import date
+
+from utils import util as utils
+from utils.checkpoint import Checkpoint
+from utils.flatten import flatten_advert_rows, flatten_adverts
+from utils.storage import ParquetDatasetWriter, RotatingCsvWriter
 
 BASE_URL = os.getenv("BASE_URL")
 
-def scrape_cars(max_pages=1000):
+DATA_DIR = "./data/cars/"
+CHECKPOINT_PATH = os.path.join(DATA_DIR, "checkpoint.json")
+PARQUET_DIR = "./data/cars_parquet/"
+
+# "csv" for car_data_*.csv chunks, "parquet" for the partitioned dataset in PARQUET_DIR
+STORAGE_FORMAT = os.getenv("STORAGE_FORMAT", "csv")
+FIELDNAMES = ["title", "price", "location", "condition", "transmission", "mileage", "description", "phone", "status"]
+
+# Output column -> advert key, and output column -> name in the advert's attrs list
+FIELDS = {"title": "title", "price": "price_title", "location": "region", "description": "short_description", "phone": "user_phone", "status": "status"}
+ATTRS = {"condition": "Condition", "transmission": "Transmission", "mileage": "Mileage"}
+
+def parquet_schema():
+    import pyarrow as pa
+
+    return pa.schema(
+        [(name, pa.string()) for name in FIELDNAMES]
+        + [("crawl_date", pa.date32()), ("region", pa.string())]
+    )
+
+def flatten_cars(ads):
+    return flatten_advert_rows(ads, FIELDS, ATTRS)
+
+def flatten_cars_table(ads, crawl_date=None):
+    # Parquet rows carry the crawl_date/region partition columns; "Ikeja, Lagos" -> "Lagos"
+    table = flatten_adverts(ads, FIELDS, ATTRS)
+    table["crawl_date"] = crawl_date or date.today()
+    regions = table["location"].fillna("").astype(str).str.rsplit(",", n=1).str[-1].str.strip()
+    table["region"] = regions.where(regions != "", "Unknown")
+    return table
+
+def open_writer(storage_format):
+    if storage_format == "parquet":
+        return ParquetDatasetWriter(PARQUET_DIR, parquet_schema(), transform=flatten_cars_table)
+    return RotatingCsvWriter(DATA_DIR, "car_data", FIELDNAMES, rows_per_file=10_000, transform=flatten_cars)
+
+def scrape_cars(writer, checkpoint, max_pages=1000):
     headers = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
         "Accept": "application/json",
     }
-    all_ads = []
+    ads_count = 0
+    rows_before = checkpoint.rows_flushed
 
-    for page in range(1, max_pages + 1):
-        url = f"{BASE_URL}/api_web/v1/listing?slug=cars&init_page=true&page={page}&webp=false&lsmid=1741338785267"
+    try:
+        for page in checkpoint.pending_pages(max_pages):
+            url = f"{BASE_URL}/api_web/v1/listing?slug=cars&init_page=true&page={page}&webp=false&lsmid=1741338785267"
 
-        for attempt in range(3): 
-            try:
-                response = requests.get(url, headers=headers, timeout=10)
-                response.raise_for_status() 
-                
-                data = response.json()
-                ads = data.get("adverts_list", {}).get("adverts", [])
-                all_ads.extend(ads)
+            for attempt in range(3): 
+                try:
+                    data = utils.get_json(url, headers=headers, timeout=10)
+                    ads = data.get("adverts_list", {}).get("adverts", [])
+                    checkpoint.complete_page(page)
+
+                    # The writer flattens and flushes the adverts in fixed-size batches
+                    if writer.write_rows(ads):
+                        checkpoint.record_flush(writer, rows_before)
+                        checkpoint.save()
+                    ads_count += len(ads)
+                    
+                    print(f"Scraped page {page} - {len(ads)} ads found")
+                    time.sleep(2) 
+                    break  
                 
-                print(f"Scraped page {page} - {len(ads)} ads found")
-                time.sleep(2) 
-                break  
-            
-            except requests.exceptions.RequestException as e:
-                print(f"Error on page {page}, attempt {attempt+1}: {e}")
-                time.sleep(2**attempt)  
-
-    return all_ads
-
-# Run the scraper
-cars_data = scrape_cars()
-
-# Process data into structured format
-flattened_data = []
-for ad in cars_data:
-    condition = transmission = mileage = None  
-    
-    attrs = ad.get("attrs", [])  
-    for attr in attrs:
-        if attr['name'] == 'Condition':
-            condition = attr['value']
-        elif attr['name'] == 'Transmission':
-            transmission = attr['value']
-        elif attr['name'] == 'Mileage':
-            mileage = attr['value']
-
-    flattened_data.append({
-        "title": ad.get("title"),
-        "price": ad.get("price_title"),
-        "location": ad.get("region"),
-        "condition": condition,
-        "transmission": transmission,
-        "mileage": mileage,
-        "description": ad.get("short_description"),
-        "phone": ad.get("user_phone"),
-        "status": ad.get("status"),
-    })
-
-# Convert to DataFrame
-df = pd.DataFrame(flattened_data)
-
-# Save data in chunks to CSV
-chunksize = 10_000  # Adjust based on need
-for i, chunk in enumerate(range(0, len(df), chunksize)):
-    chunk_df = df.iloc[chunk:chunk + chunksize]
-    output_file = f'./data/cars/car_data_{i}.csv'
-    
-    chunk_df.to_csv(output_file, index=False, header=(i == 0))
-    print(f"Saved chunk {i} to {output_file}")
+                except requests.exceptions.RequestException as e:
+                    print(f"Error on page {page}, attempt {attempt+1}: {e}")
+                    time.sleep(2**attempt)  
+            else:
+                checkpoint.fail_page(page)
+
+        checkpoint.finished = True
+        return ads_count
+    finally:
+        # Also runs on Ctrl-C or a crash: flush what we have, then record it
+        writer.flush()
+        checkpoint.record_flush(writer, rows_before)
+        checkpoint.save()
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrape car adverts into car_data_*.csv chunks.")
+    parser.add_argument("--max-pages", type=int, default=1000)
+    parser.add_argument("--resume", action="store_true", help="Continue from the last checkpoint and retry its failed pages")
+    parser.add_argument("--format", choices=["csv", "parquet"], default=STORAGE_FORMAT, help="Output storage format")
+    args = parser.parse_args()
+
+    checkpoint = Checkpoint.load(CHECKPOINT_PATH) if args.resume else Checkpoint(CHECKPOINT_PATH)
+
+    # Run the scraper, streaming rows into rotating chunk files
+    with open_writer(args.format) as writer:
+        scrape_cars(writer, checkpoint, max_pages=args.max_pages)
+
+    for output_file in writer.files:
+        print(f"Saved chunk to {output_file}")
+
+    if checkpoint.failed_pages:
+        print(f"{len(checkpoint.failed_pages)} page(s) failed after all retries; rerun with --resume to retry them")
+
+
+if __name__ == "__main__":
+    main()
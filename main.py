@@ -1,5 +1,8 @@
 from utils import util as utils
+from utils.storage import CsvWriter
 import os
+import re
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
 from dotenv import load_dotenv
 import time
 
@@ -9,15 +12,41 @@ load_dotenv()
 url = os.getenv("WEB_URL_TWO")
 baseUrl = os.getenv("BASE_URL_TWO")
 
-soup = utils.fetch_and_parse(url)
-raw_data = []
+LISTING_STRAINER = utils.listing_strainer("property-listing")
+
+# Pages downloaded at once; parsing uses one process per core
+FETCH_WORKERS = int(os.getenv("FETCH_WORKERS", "8"))
 #title, price, currency, property type, location, size, no rooms, amenities, age of property
 
+def get_page_count(pagination_links):
+    # Highest page number the pagination links to, from the link text or the end of its href
+    # (a "Last" link's href carries the real last page)
+    numbers = []
+    for link in pagination_links:
+        for candidate in (link.get_text(strip=True), re.split(r"[=/]", link.get('href', ''))[-1]):
+            if candidate.isdigit():
+                numbers.append(int(candidate))
+    return max(numbers, default=1)
+
+def find_last_page(pagination_links, page_url):
+    # A pagination widget that only shows a window of pages undercounts; keep jumping to the
+    # furthest page it links to until that page's own widget links nowhere further
+    last_page = get_page_count(pagination_links)
+    while True:
+        page_soup = utils.fetch_and_parse(page_url(last_page))
+        if page_soup is None:
+            return last_page
+        furthest = get_page_count(page_soup.select("ul.pagination li a"))
+        if furthest <= last_page:
+            return last_page
+        last_page = furthest
+
 def get_all_page_links(soup):
     print("Extracting data...")
     time.sleep(2)
 
     pagination_links = soup.select("ul.pagination li a")
+    expanded_links = []
     
     if pagination_links:
         first_link = pagination_links[0]['href']
@@ -26,7 +55,8 @@ def get_all_page_links(soup):
             base_url = first_link.rsplit('=', 1)[0] + '='
         else:
             base_url = first_link.rsplit('/', 1)[0] + '/'
-        expanded_links = [f"{base_url}{page}" for page in range(1, 51)]
+        last_page = find_last_page(pagination_links, lambda page: f"{baseUrl}{base_url}{page}")
+        expanded_links = [f"{base_url}{page}" for page in range(1, last_page + 1)]
        
     links = [baseUrl + a for a in expanded_links]
 
@@ -70,21 +100,41 @@ def get_data_from_page(soup):
     return page_data
 
 
-links = get_all_page_links(soup)
+def parse_page(html):
+    # Runs in a worker process, so it takes raw HTML rather than a soup
+    return get_data_from_page(utils.make_soup(html, parse_only=LISTING_STRAINER))
+
+def main():
+    soup = utils.fetch_and_parse(url)
+    links = get_all_page_links(soup)
+
+    output_file = 'data/estate_data_lagos_sale.csv'
+    fieldnames = ["title", "price", "property type", "location", "size", "status", "type", "date"]
+    if os.path.exists(output_file):
+        os.remove(output_file)
+
+    with CsvWriter(output_file, fieldnames) as writer:
+        if (len(links) <= 0):
+            writer.write_rows(get_data_from_page(soup))
+
+        # Fetchers keep the network busy while finished pages are parsed on every core
+        # and their rows are appended to the CSV as soon as they come back
+        with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as fetchers, ProcessPoolExecutor() as parsers:
+            pending = {fetchers.submit(utils.fetch_html, link): "fetch" for link in links}
 
-if (len(links) <= 0):
-    page_soup = utils.fetch_and_parse(url)
-    page_data = get_data_from_page(page_soup)
-    raw_data.extend(page_data)
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage = pending.pop(future)
+                    if stage == "fetch":
+                        html = future.result()
+                        if html:
+                            pending[parsers.submit(parse_page, html)] = "parse"
+                    else:
+                        writer.write_rows(future.result())
 
-for link in links[:-1]:
-    print(f"{link}")
-    page_soup = utils.fetch_and_parse(link)
-    page_data = get_data_from_page(page_soup)
-    raw_data.extend(page_data)
+    print(writer.rows_written)
 
-print(len(raw_data))
 
-output_file = 'data/estate_data_lagos_sale.csv'
-fieldnames = ["title", "price", "property type", "location", "size", "status", "type", "date"]
-utils.save_to_csv(raw_data, output_file, fieldnames)
+if __name__ == "__main__":
+    main()
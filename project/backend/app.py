@@ -1,25 +1,278 @@
-from fastapi import FastAPI
-import joblib
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Header, HTTPException, Request
+from starlette.concurrency import run_in_threadpool
+import io
+import json
+import logging
+import numpy as np
+import os
 import pandas as pd
+import resource
+import secrets
+import time
 
-model = joblib.load("./model/price_prediction_model.pkl")
+from batching import BatcherClosed, MicroBatcher
+from cache import PredictionCache, model_fingerprint
+from locations import LocationIndex
+from registry import ModelRegistry, load_model
 
-app = FastAPI()
+logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 
-from pydantic import BaseModel
+MODEL_PATH = "./model/price_prediction_model.pkl"
+# train.py publishes every model to versions/<version>/; the newest one is served and watched for
+MODEL_VERSIONS_DIR = "./model/versions"
+# Location names and codes the current model was trained with (train.py keeps it up to date)
+LOCATIONS_PATH = "./model/locations.json"
+# Flattened arrays of the current artifact, memory-mapped by every worker in MODEL_LOAD_MODE=mmap
+FLAT_MODEL_DIR = "./model/flat"
+# Seconds between checks for a new version; 0 turns hot reloading off
+MODEL_POLL_SECONDS = float(os.getenv("MODEL_POLL_SECONDS", "10"))
+# Required in the X-Admin-Token header of admin endpoints (model rollback); unset disables them
+MODEL_ADMIN_TOKEN = os.getenv("MODEL_ADMIN_TOKEN")
+
+# "joblib" unpickles a private copy of the forest per worker; "mmap" shares one copy through the page cache
+MODEL_LOAD_MODE = os.getenv("MODEL_LOAD_MODE", "joblib")
+# "flat" predicts small batches with FlatForest node arrays instead of sklearn's per-call overhead
+INFERENCE_ENGINE = os.getenv("INFERENCE_ENGINE", "sklearn")
+# Above this many rows sklearn's compiled loop is faster again
+FLAT_ENGINE_MAX_ROWS = int(os.getenv("FLAT_ENGINE_MAX_ROWS", "256"))
+
+def memory_usage():
+    # Resident and proportional (shared pages split between processes) set size in MB
+    try:
+        with open("/proc/self/smaps_rollup") as file:
+            fields = dict(line.split(":", 1) for line in file if line.startswith(("Rss:", "Pss:")))
+        return {name.lower(): int(value.split()[0]) / 1024 for name, value in fields.items()}
+    except OSError:
+        return {"max_rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}
+
+# Column order the model was trained with; must match PropertyInput below
+FEATURES = ["location_code", "sqm", "bathrooms", "bedrooms", "furnishing_code"]
+
+def load_artifact(path, version):
+    return load_model(path, version, FEATURES, MODEL_LOAD_MODE, INFERENCE_ENGINE, FLAT_MODEL_DIR, FLAT_ENGINE_MAX_ROWS)
+
+locations = LocationIndex.load(LOCATIONS_PATH)
+
+def on_swap(loaded):
+    global locations
+    # Cached prices belong to the model that computed them
+    if cache is not None:
+        cache.clear(model_version=loaded.version)
+    # A retrained model can come with new locations
+    if os.stat(LOCATIONS_PATH).st_mtime_ns != locations.mtime:
+        locations = LocationIndex.load(LOCATIONS_PATH)
+
+registry = ModelRegistry(MODEL_VERSIONS_DIR, load_artifact, MODEL_POLL_SECONDS, on_swap=on_swap)
+
+# Created below, once the first model is live
+cache = None
+
+start = time.perf_counter()
+latest = registry.latest_version()
+if latest is not None:
+    registry.activate(registry.load_version(latest))
+else:
+    # No published versions yet: serve the plain artifact, versioned by its fingerprint
+    registry.activate(registry.load_version(model_fingerprint(MODEL_PATH), MODEL_PATH))
+memory = ", ".join(f"{name} {value:,.1f} MB" for name, value in memory_usage().items())
+logging.info(f"Worker {os.getpid()} loaded the model ({MODEL_LOAD_MODE}) in {time.perf_counter() - start:.2f}s - {memory}")
+
+# Micro-batching groups concurrent /predict_price/ calls into one predict; off by default
+MICRO_BATCHING = os.getenv("MICRO_BATCHING", "off") == "on"
+MICRO_BATCH_MAX_SIZE = int(os.getenv("MICRO_BATCH_MAX_SIZE", "64"))
+MICRO_BATCH_MAX_WAIT_MS = float(os.getenv("MICRO_BATCH_MAX_WAIT_MS", "3"))
+
+# Cache of recent predictions; PREDICTION_CACHE_SIZE=0 turns it off. PREDICTION_CACHE_DB shares it between workers
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "10000"))
+PREDICTION_CACHE_TTL = float(os.getenv("PREDICTION_CACHE_TTL", "3600"))
+PREDICTION_CACHE_SQM_BUCKET = float(os.getenv("PREDICTION_CACHE_SQM_BUCKET", "0"))
+PREDICTION_CACHE_DB = os.getenv("PREDICTION_CACHE_DB")
+cache = PredictionCache(
+    PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL, PREDICTION_CACHE_SQM_BUCKET, PREDICTION_CACHE_DB,
+    model_version=registry.current.version,
+) if PREDICTION_CACHE_SIZE > 0 else None
+
+@asynccontextmanager
+async def lifespan(app):
+    registry.start()
+    yield
+    await registry.stop()
+    if batcher is not None:
+        await batcher.close()
+
+app = FastAPI(lifespan=lifespan)
+
+from pydantic import BaseModel, Field, ValidationError, model_validator
 
 class PropertyInput(BaseModel):
-    location_code: int  # Location code (e.g., 5 for Ikoyi)
-    sqm: float     # Property size in square meters
+    location_code: int | None = None  # Location code (e.g., 5 for Ikoyi)
+    sqm: float = Field(allow_inf_nan=False)  # Property size in square meters
     bathrooms: int # Number of bathrooms
     bedrooms: int  # Number of bedrooms
     furnishing_code: int  # 0 = Unfurnished, 1 = Semi-Furnished, 2 = Furnished
+    location: str | None = None  # Location name (e.g., "Maitama, Abuja"), used instead of location_code
+
+    @model_validator(mode="after")
+    def resolve_location(self):
+        if self.location is not None:
+            code = locations.resolve(self.location)
+            if code is None:
+                suggestions = [match["location"] for match in locations.search(self.location, limit=3)]
+                hint = f"; did you mean {', '.join(suggestions)}?" if suggestions else ""
+                raise ValueError(f"Unknown location {self.location!r}{hint}")
+            self.location_code = code
+        elif self.location_code is None:
+            raise ValueError("Either location or location_code is required")
+        return self
+
+def predict_rows(rows):
+    # One feature matrix and one model.predict call for any number of inputs.
+    # The live model is read once, so a concurrent swap can't split a batch across versions
+    loaded = registry.current
+    matrix = np.array([[getattr(row, name) for name in FEATURES] for row in rows], dtype=np.float64)
+    return loaded.version, loaded.predict(matrix)
+
+def predict_items(rows):
+    # For the micro-batcher: one (version, price) result per caller
+    version, prices = predict_rows(rows)
+    return [(version, price) for price in prices]
+
+def format_price(price):
+    return f"₦{price:,.2f}"
+
+batcher = MicroBatcher(predict_items, MICRO_BATCH_MAX_SIZE, MICRO_BATCH_MAX_WAIT_MS) if MICRO_BATCHING else None
+
+def cached_price(data):
+    # Returns (input to predict on, the model version a cached price came from, cached price or None).
+    # The version is read once, so a concurrent swap can't mix it up with another version's key
+    if cache is None:
+        return data, None, None
+    values = cache.normalize(data.model_dump(include=set(FEATURES)))
+    version = cache.model_version
+    return PropertyInput(**values), version, cache.get(cache.key(values, version))
+
+def store_prices(rows, version, prices):
+    # Cached under the version that actually computed them
+    if cache is not None:
+        for row, price in zip(rows, prices):
+            cache.put(cache.key(row.model_dump(include=set(FEATURES)), version), float(price))
+
+async def off_loop(function, *args):
+    # The SQLite-backed cache blocks on disk, so it's used from a worker thread; in-memory lookups
+    # are quicker than the thread hop
+    if cache is not None and cache.blocking:
+        return await run_in_threadpool(function, *args)
+    return function(*args)
 
 @app.post("/predict_price/")
-def predict_price(data: PropertyInput):
-    input_data = pd.DataFrame([data.model_dump()])
+async def predict_price(data: PropertyInput):
+    data, version, predicted_price = await off_loop(cached_price, data)
+    if predicted_price is None:
+        if batcher is not None:
+            try:
+                version, predicted_price = await batcher.submit(data)
+            except BatcherClosed as e:
+                raise HTTPException(status_code=503, detail=str(e))
+        else:
+            version, prices = await run_in_threadpool(predict_rows, [data])
+            predicted_price = prices[0]
+        await off_loop(store_prices, [data], version, [predicted_price])
+
+    return {"predicted_price": format_price(predicted_price), "model_version": version}
+
+async def read_batch(request: Request):
+    # JSON list of inputs, or CSV (Content-Type: text/csv) with a header naming the fields
+    body = await request.body()
+    if request.headers.get("content-type", "").startswith("text/csv"):
+        try:
+            frame = pd.read_csv(io.BytesIO(body), dtype=str, keep_default_na=False)
+        except (pd.errors.ParserError, pd.errors.EmptyDataError, UnicodeDecodeError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid CSV: {e}")
+        # Empty cells are missing values (e.g. location_code when the row gives a location name)
+        return [{name: value for name, value in row.items() if value != ""} for row in frame.to_dict(orient="records")]
+
+    try:
+        items = json.loads(body)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON: {e}")
+    if not isinstance(items, list):
+        raise HTTPException(status_code=422, detail="Expected a JSON list of properties")
+    return items
+
+def lookup_batch(items):
+    # Validate item by item, so one bad row is reported instead of failing the batch, and look up the cache
+    results = [None] * len(items)
+    misses, positions = [], []
+    for index, item in enumerate(items):
+        try:
+            data = PropertyInput.model_validate(item)
+        except ValidationError as e:
+            results[index] = {"index": index, "error": json.loads(e.json(include_url=False))}
+            continue
+
+        data, version, price = cached_price(data)
+        if price is not None:
+            results[index] = {"index": index, "predicted_price": format_price(price), "model_version": version}
+        else:
+            misses.append(data)
+            positions.append(index)
+    return results, misses, positions
+
+def predict_misses(misses):
+    version, prices = predict_rows(misses)
+    store_prices(misses, version, prices)
+    return version, prices
+
+@app.post("/predict_price/batch/")
+async def predict_price_batch(request: Request):
+    items = await read_batch(request)
+
+    results, misses, positions = await off_loop(lookup_batch, items)
+    if misses:
+        # Cached hits and fresh predictions can come from different versions if a swap lands in
+        # between, so every result says which model priced it
+        version, prices = await run_in_threadpool(predict_misses, misses)
+        for index, price in zip(positions, prices):
+            results[index] = {"index": index, "predicted_price": format_price(price), "model_version": version}
+
+    errors = sum("error" in result for result in results)
+    return {"count": len(items), "errors": errors, "results": results}
+
+@app.get("/locations")
+def search_locations(q: str = "", limit: int = 10, fuzzy: bool = True):
+    # Typeahead: names with a word starting with q, then close matches; limit=0 returns every match
+    return locations.search(q, limit=max(limit, 0), fuzzy=fuzzy)
+
+@app.get("/locations/resolve")
+def resolve_location(name: str):
+    record = locations.match(name)
+    if record is None:
+        raise HTTPException(status_code=404, detail={"error": f"Unknown location {name!r}", "suggestions": locations.search(name, limit=5)})
+    return record
+
+@app.get("/model/status")
+def model_status():
+    return registry.status()
 
-    predicted_price = model.predict(input_data)[0]
+def require_admin(token):
+    if not MODEL_ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled; set MODEL_ADMIN_TOKEN to enable them")
+    if token is None or not secrets.compare_digest(token, MODEL_ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Missing or wrong X-Admin-Token header")
 
-    return {"predicted_price": f"₦{predicted_price:,.2f}"}
+@app.post("/model/rollback")
+def model_rollback(x_admin_token: str | None = Header(default=None)):
+    # Recorded in the versions directory, so every worker switches back within MODEL_POLL_SECONDS
+    require_admin(x_admin_token)
+    try:
+        registry.rollback()
+    except LookupError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return registry.status()
 
+@app.get("/cache/stats")
+def cache_stats():
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
@@ -0,0 +1,100 @@
+import asyncio
+
+
+class BatcherClosed(RuntimeError):
+    # Raised to callers still waiting (or arriving) after close()
+    pass
+
+
+class MicroBatcher:
+    """
+    Collects single predictions that arrive close together and runs them as
+    one batch. The first queued item opens a window of `max_wait_ms`; every
+    item that arrives before it closes (up to `max_batch_size`) goes into
+    the same `predict(items)` call, which runs in a worker thread so the
+    event loop keeps accepting requests meanwhile. Each caller gets back
+    its own element of the result.
+
+    A larger window or batch size trades a little latency per request for
+    throughput under concurrent load; with no concurrent traffic a request
+    waits at most `max_wait_ms`. `close` fails every request still queued
+    or in flight with BatcherClosed, so nothing is left waiting forever.
+    """
+
+    def __init__(self, predict, max_batch_size=64, max_wait_ms=3.0):
+        self.predict = predict
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.queue = None
+        self.worker = None
+        # The batch being collected or predicted, so close() can fail it if it never finishes
+        self.inflight = []
+        self.closed = False
+        self.batches = 0
+        self.items = 0
+
+    async def submit(self, item):
+        if self.closed:
+            raise BatcherClosed("The prediction batcher is shut down")
+        if self.worker is None:
+            # Created lazily so the queue and task belong to the server's running loop
+            self.queue = asyncio.Queue()
+            self.worker = asyncio.create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((item, future))
+        return await future
+
+    async def _collect(self):
+        # Kept on self while it fills, so close() also reaches items taken off the queue
+        batch = self.inflight = [await self.queue.get()]
+        deadline = asyncio.get_running_loop().time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - asyncio.get_running_loop().time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            # Callers that disconnected while waiting are dropped from the batch
+            batch = [(item, future) for item, future in batch if not future.cancelled()]
+            if not batch:
+                continue
+            self.inflight = batch
+
+            try:
+                results = await asyncio.to_thread(self.predict, [item for item, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.items += len(batch)
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    async def close(self):
+        self.closed = True
+        if self.worker is not None:
+            self.worker.cancel()
+            try:
+                await self.worker
+            except asyncio.CancelledError:
+                pass
+            self.worker = None
+
+        waiting = [future for _, future in self.inflight]
+        while self.queue is not None and not self.queue.empty():
+            waiting.append(self.queue.get_nowait()[1])
+        for future in waiting:
+            if not future.done():
+                future.set_exception(BatcherClosed("The server shut down before this prediction ran"))
+        self.inflight = []
@@ -0,0 +1,127 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def model_fingerprint(path):
+    # Changes whenever the artifact is replaced, so keys from an older model never match
+    stat = os.stat(path)
+    return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+
+class PredictionCache:
+    """
+    Bounded LRU cache of predicted prices with a TTL, keyed on the
+    normalized input plus the model fingerprint.
+
+    With `sqm_bucket` set, sqm is rounded to the nearest multiple before
+    keying (callers should predict on the same rounded value, see
+    `normalize`), so near-identical sizes share one entry. `store_path`
+    adds a SQLite file shared by every worker on the box: a local miss
+    checks it before computing, and new results are written to both.
+    Reads and writes of that file block, so async callers should make
+    them from a worker thread (see `blocking`).
+    """
+
+    def __init__(self, max_entries=10_000, ttl_seconds=3600, sqm_bucket=0, store_path=None, model_version=""):
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self.sqm_bucket = sqm_bucket
+        self.model_version = model_version
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        # The SQLite connection is shared by worker threads; the in-memory lock isn't held while it's used
+        self.store_lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.store = None
+        if store_path:
+            self.store = sqlite3.connect(store_path, check_same_thread=False, isolation_level=None)
+            self.store.execute("PRAGMA journal_mode=WAL")
+            self.store.execute("CREATE TABLE IF NOT EXISTS predictions (key TEXT PRIMARY KEY, price REAL, expires REAL)")
+
+    def normalize(self, values):
+        # values: dict of PropertyInput fields; returns the (possibly bucketed) values to predict on
+        values = dict(values)
+        if self.sqm_bucket:
+            values["sqm"] = float(round(values["sqm"] / self.sqm_bucket) * self.sqm_bucket)
+        return values
+
+    @property
+    def blocking(self):
+        # Whether get/put can wait on disk
+        return self.store is not None
+
+    def key(self, values, model_version=None):
+        # Keyed on `model_version` (default: the live one), the version the price comes from
+        version = self.model_version if model_version is None else model_version
+        return "|".join([version] + [f"{name}={values[name]}" for name in sorted(values)])
+
+    def get(self, key):
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                price, expires = entry
+                if expires > now:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return price
+                del self.entries[key]
+
+        if self.store is not None:
+            with self.store_lock:
+                row = self.store.execute("SELECT price, expires FROM predictions WHERE key = ?", (key,)).fetchone()
+            if row is not None and row[1] > now:
+                with self.lock:
+                    self._remember(key, row[0], row[1])
+                    self.shared_hits += 1
+                return row[0]
+
+        with self.lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, price):
+        expires = time.time() + self.ttl
+        with self.lock:
+            self._remember(key, price, expires)
+        if self.store is not None:
+            with self.store_lock:
+                self.store.execute("INSERT OR REPLACE INTO predictions VALUES (?, ?, ?)", (key, price, expires))
+
+    def _remember(self, key, price, expires):
+        self.entries[key] = (price, expires)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self, model_version=None):
+        with self.lock:
+            self.entries.clear()
+            if model_version is not None:
+                self.model_version = model_version
+        if self.store is not None:
+            with self.store_lock:
+                self.store.execute("DELETE FROM predictions WHERE expires <= ?", (time.time(),))
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            return {
+                "model_version": self.model_version,
+                "entries": len(self.entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits + self.shared_hits) / lookups if lookups else 0.0,
+            }
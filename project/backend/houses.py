@@ -1,121 +1,204 @@
+"""
+Scrape estate listings from BASE_URL into DATA_DIR (CSV chunks) or
+PARQUET_DIR, skipping adverts that were already saved.
+
+Run from the repo root: python -m project.backend.houses [--resume]
+"""
 import pandas as pd
 import requests
 import time
 import os
 import glob
+import argparse
+from datetime import date
+
+from utils import util as utils
+from utils.checkpoint import Checkpoint
+from utils.crawler import HostRateLimiter, crawl_pages
+from utils.flatten import flatten_advert_rows, flatten_adverts
+from utils.seen_ids import SeenIdIndex
+from utils.storage import ParquetDatasetWriter, RotatingCsvWriter, read_listings
 
 DATA_DIR = "./data/estates_new/"
 CSV_PATTERN = os.path.join(DATA_DIR, "data_*.csv")
+CHECKPOINT_PATH = os.path.join(DATA_DIR, "checkpoint.json")
+SEEN_INDEX_PATH = os.path.join(DATA_DIR, "seen_ids")
+PARQUET_DIR = "./data/estates_parquet/"
+
+# "csv" for data_*.csv chunks, "parquet" for the partitioned dataset in PARQUET_DIR
+STORAGE_FORMAT = os.getenv("STORAGE_FORMAT", "csv")
 
 BASE_URL = os.getenv("BASE_URL")
 
-def load_seen_ads():
-    seen_ads = set()
-    csv_files = glob.glob(CSV_PATTERN)
-    
-    for file in csv_files:
+FIELDNAMES = ["id", "title", "price", "location", "property_size", "bedrooms", "furnishing", "bathrooms", "description", "status"]
+
+# Output column -> advert key, and output column -> name in the advert's attrs list
+FIELDS = {"id": "id", "title": "title", "price": "price_title", "location": "region", "description": "short_description", "status": "status"}
+ATTRS = {"property_size": "Property size", "bedrooms": "Bedrooms", "furnishing": "Furnishing", "bathrooms": "Bathrooms"}
+
+# Crawl settings: pages kept in flight and the request budget per host
+CONCURRENCY = int(os.getenv("CRAWL_CONCURRENCY", "8"))
+REQUESTS_PER_SECOND = float(os.getenv("CRAWL_REQUESTS_PER_SECOND", "4"))
+
+def parquet_schema():
+    import pyarrow as pa
+
+    return pa.schema([
+        ("id", pa.int64()),
+        ("title", pa.string()),
+        ("price", pa.string()),
+        ("location", pa.string()),
+        ("property_size", pa.string()),
+        ("bedrooms", pa.string()),
+        ("furnishing", pa.dictionary(pa.int8(), pa.string())),
+        ("bathrooms", pa.string()),
+        ("description", pa.string()),
+        ("status", pa.dictionary(pa.int8(), pa.string())),
+        ("crawl_date", pa.date32()),
+        ("region", pa.string()),
+    ])
+
+def load_seen_ads(rebuild=False):
+    # The stored listings are only scanned once, to seed the on-disk index
+    if rebuild or not SeenIdIndex.exists(SEEN_INDEX_PATH):
+        print("Building the seen-ID index from stored listings...")
+        ids = SeenIdIndex.read_csv_ids(glob.glob(CSV_PATTERN))
+        if os.path.isdir(PARQUET_DIR):
+            ids.append(read_listings(PARQUET_DIR, parquet_schema(), columns=["id"])["id"].dropna().astype("int64"))
+        return SeenIdIndex.from_ids(SEEN_INDEX_PATH, ids)
+    return SeenIdIndex(SEEN_INDEX_PATH)
+
+def fetch_page(page, headers, limiter):
+    url = f"{BASE_URL}/api_web/v1/listing?slug=real-estate&init_page=true&page={page}&webp=false&lsmid=1741609386457"
+
+    for attempt in range(3):
+        limiter.wait(url)
         try:
-            df = pd.read_csv(file, dtype={"id": str})
-            seen_ads.update(df["id"].astype(str).tolist())
-        except Exception as e:
-            print(f"Warning: Could not read {file}. Error: {e}")
-    
-    return seen_ads
-
-def scrape_houses(max_pages=5000):
+            data = utils.get_json(url, headers=headers, timeout=10)
+            return data.get("adverts_list", {}).get("adverts", [])
+
+        except requests.exceptions.RequestException as e:
+            print(f"Error on page {page}, attempt {attempt+1}: {e}")
+            time.sleep(2**attempt)
+
+    return None
+
+def flatten_ads(ads):
+    # CSV rows; missing fields and attributes are saved as "N/A"
+    return flatten_advert_rows(ads, FIELDS, ATTRS, default="N/A")
+
+def flatten_ads_table(ads, crawl_date=None):
+    # Parquet rows, flattened column-wise straight into the DataFrame the writer converts
+    return listings_table(flatten_adverts(ads, FIELDS, ATTRS, default="N/A"), crawl_date)
+
+def listings_table(table, crawl_date=None):
+    # Typed id plus the crawl_date/region partition columns
+    ids = pd.to_numeric(table["id"], errors="coerce")
+    invalid = ids.isna()
+    if invalid.any():
+        # The id column is int64; CSV output keeps these, Parquet can't without writing a null id
+        print(f"Skipping {invalid.sum()} advert(s) without a numeric id: {table['id'][invalid].tolist()[:5]}")
+        table, ids = table[~invalid].reset_index(drop=True), ids[~invalid].reset_index(drop=True)
+    table["id"] = ids.astype("int64")
+    table["crawl_date"] = crawl_date or date.today()
+    table["region"] = region_of(table["location"])
+    return table
+
+def region_of(locations):
+    # "Asokoro, Abuja" -> "Abuja"
+    regions = locations.fillna("").astype(str).str.rsplit(",", n=1).str[-1].str.strip()
+    return regions.where(regions != "", "Unknown")
+
+def open_writer(storage_format):
+    if storage_format == "parquet":
+        return ParquetDatasetWriter(PARQUET_DIR, parquet_schema(), transform=flatten_ads_table)
+    return RotatingCsvWriter(DATA_DIR, "data", FIELDNAMES, rows_per_file=10_000, transform=flatten_ads)
+
+def scrape_houses(writer, checkpoint, seen_ads, max_pages=5000, concurrency=CONCURRENCY, requests_per_second=REQUESTS_PER_SECOND):
     headers = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
         "Accept": "application/json",
     }
     
-    seen_ads = load_seen_ads() 
-    all_ads = []
+    new_ads_count = 0
     consecutive_empty_pages = 0  
-
-    for page in range(1, max_pages + 1):
-        url = f"{BASE_URL}/api_web/v1/listing?slug=real-estate&init_page=true&page={page}&webp=false&lsmid=1741609386457"
-
-        for attempt in range(3):
-            try:
-                response = requests.get(url, headers=headers, timeout=10)
-                response.raise_for_status()
-
-                data = response.json()
-                ads = data.get("adverts_list", {}).get("adverts", [])
-
-                # Filter out already scraped ads
-                new_ads = [ad for ad in ads if str(ad.get("id")) not in seen_ads]
-
-                if not new_ads:
-                    consecutive_empty_pages += 1
-                    print(f"Page {page}: No new ads found (streak: {consecutive_empty_pages})")
-                    if consecutive_empty_pages >= 5:
-                        print("Stopping: No new ads found for multiple pages.")
-                        return all_ads
-                else:
-                    consecutive_empty_pages = 0  
-                
-                all_ads.extend(new_ads)
-                seen_ads.update(str(ad["id"]) for ad in new_ads)
-
-                print(f"Scraped page {page} - {len(new_ads)} new ads found")
-                time.sleep(2)
-                break  
-
-            except requests.exceptions.RequestException as e:
-                print(f"Error on page {page}, attempt {attempt+1}: {e}")
-                time.sleep(2**attempt)  
-
-    return all_ads
-
-# Run the scraper
-new_houses_data = scrape_houses()
-
-if new_houses_data:
-    # Process new ads into structured format
-    flattened_data = []
-    
-    for ad in new_houses_data:
-        # Handle missing attributes safely
-        property_size = bedrooms = furnishing = bathrooms = "N/A"
-        attrs = ad.get("attrs", [])
-        
-        for attr in attrs:
-            if attr['name'] == 'Property size':
-                property_size = attr.get('value', 'N/A')
-            elif attr['name'] == 'Bedrooms':
-                bedrooms = attr.get('value', 'N/A')
-            elif attr['name'] == 'Furnishing':
-                furnishing = attr.get('value', 'N/A')
-            elif attr['name'] == 'Bathrooms':
-                bathrooms = attr.get('value', 'N/A')
-
-        flattened_data.append({
-            "id": str(ad.get("id")),
-            "title": ad.get("title", "N/A"),
-            "price": ad.get("price_title", "N/A"),
-            "location": ad.get("region", "N/A"),
-            "property_size": property_size,
-            "bedrooms": bedrooms,
-            "furnishing": furnishing,
-            "bathrooms": bathrooms,
-            "description": ad.get("short_description", "N/A"),
-            "status": ad.get("status", "N/A"),
-        })
-
-    # Convert to DataFrame
-    df = pd.DataFrame(flattened_data)
-
-    # Save new ads in chunks to CSV
-    os.makedirs(DATA_DIR, exist_ok=True)
-    chunksize = 10_000
-
-    for i, chunk in enumerate(range(0, len(df), chunksize)):
-        chunk_df = df.iloc[chunk:chunk + chunksize]
-        output_file = os.path.join(DATA_DIR, f"data_{i}.csv")
-
-        chunk_df.to_csv(output_file, index=False, header=(not os.path.exists(output_file)), mode="a")
-        print(f"Saved {len(chunk_df)} new ads to {output_file}")
-
-else:
-    print("No new ads found. No data saved.")
+    limiter = HostRateLimiter(requests_per_second)
+    rows_before = checkpoint.rows_flushed
+    resume_from = checkpoint.last_completed_page
+
+    # Pages are fetched concurrently but handed back in page order,
+    # so the dedup against seen_ads and the stop rule behave as before
+    pages = crawl_pages(lambda page: fetch_page(page, headers, limiter), checkpoint.pending_pages(max_pages), concurrency)
+
+    try:
+        for page, ads in pages:
+            if ads is None:
+                checkpoint.fail_page(page)
+                continue
+
+            # Filter out already scraped ads
+            new_ads = [ad for ad in ads if str(ad.get("id")) not in seen_ads]
+            checkpoint.complete_page(page)
+
+            # Retried failed pages are older than the resume point, so they don't count towards the stop rule
+            if not new_ads and page > resume_from:
+                consecutive_empty_pages += 1
+                print(f"Page {page}: No new ads found (streak: {consecutive_empty_pages})")
+                if consecutive_empty_pages >= 5:
+                    print("Stopping: No new ads found for multiple pages.")
+                    checkpoint.finished = True
+                    pages.close()
+                    return new_ads_count
+            elif new_ads:
+                consecutive_empty_pages = 0  
+            
+            # Adverts go straight to the writer, which flattens and flushes them in fixed-size batches
+            seen_ads.update(str(ad["id"]) for ad in new_ads)
+            if writer.write_rows(new_ads):
+                seen_ads.flush()
+                checkpoint.record_flush(writer, rows_before)
+                checkpoint.save()
+            new_ads_count += len(new_ads)
+
+            print(f"Scraped page {page} - {len(new_ads)} new ads found")
+
+        checkpoint.finished = True
+        return new_ads_count
+    finally:
+        # Also runs on Ctrl-C or a crash: flush what we have, then record it
+        writer.flush()
+        seen_ads.flush()
+        checkpoint.record_flush(writer, rows_before)
+        checkpoint.save()
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrape new real-estate adverts into data_*.csv chunks.")
+    parser.add_argument("--max-pages", type=int, default=5000)
+    parser.add_argument("--resume", action="store_true", help="Continue from the last checkpoint and retry its failed pages")
+    parser.add_argument("--rebuild-seen-index", action="store_true", help="Rebuild the seen-ID index from the stored listings")
+    parser.add_argument("--format", choices=["csv", "parquet"], default=STORAGE_FORMAT, help="Output storage format")
+    args = parser.parse_args()
+
+    seen_ads = load_seen_ads(rebuild=args.rebuild_seen_index)
+    print(f"Loaded {len(seen_ads)} seen ad IDs")
+
+    checkpoint = Checkpoint.load(CHECKPOINT_PATH) if args.resume else Checkpoint(CHECKPOINT_PATH)
+    if args.resume:
+        print(f"Resuming after page {checkpoint.last_completed_page} with {len(checkpoint.failed_pages)} failed page(s) to retry")
+
+    with open_writer(args.format) as writer:
+        new_ads_count = scrape_houses(writer, checkpoint, seen_ads, max_pages=args.max_pages)
+
+    if new_ads_count:
+        for output_file in writer.files:
+            print(f"Saved new ads to {output_file}")
+        print(f"Saved {writer.rows_written} new ads in total")
+    else:
+        print("No new ads found. No data saved.")
+
+    if checkpoint.failed_pages:
+        print(f"{len(checkpoint.failed_pages)} page(s) failed after all retries; rerun with --resume to retry them")
+
+
+if __name__ == "__main__":
+    main()
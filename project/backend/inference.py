@@ -0,0 +1,145 @@
+import os
+import shutil
+import time
+
+import numpy as np
+
+ARRAYS = ("roots", "left", "right", "feature", "threshold", "value", "missing_left")
+# Part of the shared directory name, so arrays saved in an older layout are rebuilt, not misread
+LAYOUT_VERSION = 2
+# Other artifacts' arrays are only removed once they are this old, so workers still loading them aren't cut off
+PRUNE_GRACE_SECONDS = 600
+
+
+class FlatForest:
+    """
+    A fitted sklearn forest (or single tree) regressor flattened into one
+    set of node arrays, so predicting a row is a few NumPy gathers per
+    tree level instead of pandas validation plus a Python call per tree.
+
+    Every tree's nodes are concatenated; roots[i] is where tree i starts
+    and child indices are global. Leaves point to themselves, which is how
+    a walk knows it has finished. missing_left[n] is where a NaN feature
+    goes at node n, as sklearn's missing_go_to_left.
+    """
+
+    def __init__(self, roots, left, right, feature, threshold, value, missing_left):
+        self.roots = roots
+        self.left = left
+        self.right = right
+        self.feature = feature
+        self.threshold = threshold
+        self.value = value
+        self.missing_left = missing_left
+
+    @classmethod
+    def from_model(cls, model):
+        estimators = getattr(model, "estimators_", [model])
+        roots, left, right, feature, threshold, value, missing_left = [], [], [], [], [], [], []
+        offset = 0
+
+        for estimator in estimators:
+            # Boosted ensembles sum scaled trees instead of averaging them, so they don't fit here
+            if not hasattr(estimator, "tree_"):
+                raise ValueError(f"FlatForest can't flatten a {type(model).__name__}")
+            tree = estimator.tree_
+            if tree.n_outputs != 1:
+                raise ValueError("FlatForest only supports single-output regressors")
+
+            nodes = np.arange(tree.node_count, dtype=np.int64) + offset
+            is_leaf = tree.children_left == -1
+            roots.append(offset)
+            left.append(np.where(is_leaf, nodes, tree.children_left + offset))
+            right.append(np.where(is_leaf, nodes, tree.children_right + offset))
+            feature.append(np.where(is_leaf, 0, tree.feature))
+            threshold.append(tree.threshold)
+            value.append(tree.value[:, 0, 0])
+            # sklearn < 1.3 has no missing-value support: NaN fails every <= and goes right
+            missing_left.append(getattr(tree, "missing_go_to_left", np.zeros(tree.node_count, dtype=np.uint8)))
+
+            offset += tree.node_count
+
+        return cls(
+            np.array(roots, dtype=np.int64),
+            np.concatenate(left).astype(np.int32),
+            np.concatenate(right).astype(np.int32),
+            np.concatenate(feature).astype(np.int32),
+            np.concatenate(threshold).astype(np.float64),
+            np.concatenate(value).astype(np.float64),
+            np.concatenate(missing_left).astype(bool),
+        )
+
+    def save(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        for name in ARRAYS:
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name))
+
+    @classmethod
+    def load(cls, directory, mmap_mode="r"):
+        # With mmap_mode="r" every process maps the same page-cache pages instead of holding its own copy
+        return cls(*(np.asarray(np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode)) for name in ARRAYS))
+
+    def predict(self, X):
+        # sklearn compares float32 features against float64 thresholds; cast the same way so splits match
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+
+        n_rows, n_features = X.shape
+        n_trees = len(self.roots)
+        flat_X = X.ravel()
+
+        # One (row, tree) walker per entry; only those still on an internal node are advanced
+        nodes = np.tile(self.roots, n_rows)
+        row_offsets = np.repeat(np.arange(n_rows) * n_features, n_trees)
+        active = np.flatnonzero(self.left[nodes] != nodes)
+        while active.size:
+            current = nodes[active]
+            values = flat_X[row_offsets[active] + self.feature[current]]
+            go_left = np.where(np.isnan(values), self.missing_left[current], values <= self.threshold[current])
+            nodes[active] = np.where(go_left, self.left[current], self.right[current])
+            active = active[self.left[nodes[active]] != nodes[active]]
+
+        # Mean of the per-tree predictions, as RandomForestRegressor.predict
+        return self.value[nodes].reshape(n_rows, n_trees).mean(axis=1)
+
+
+def prune_flat_dirs(root, keep, grace_seconds=PRUNE_GRACE_SECONDS):
+    # Remove arrays (and abandoned temp builds) of other artifacts nobody has built or loaded for grace_seconds
+    cutoff = time.time() - grace_seconds
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        try:
+            if name != keep and os.stat(path).st_mtime < cutoff:
+                shutil.rmtree(path, ignore_errors=True)
+        except FileNotFoundError:
+            pass
+
+
+def load_shared_forest(model_path, root, fingerprint, grace_seconds=PRUNE_GRACE_SECONDS):
+    """
+    Memory-map the flattened arrays of `model_path` from root/<fingerprint>/,
+    building them from the pickle first if this artifact hasn't been
+    flattened yet. Workers that start together may all build; each writes
+    to its own temp directory and the first rename wins. Arrays of other
+    artifacts are pruned only once no worker has built or loaded them for
+    `grace_seconds`, since other workers may still be loading them.
+    """
+    name = f"v{LAYOUT_VERSION}-{fingerprint}"
+    directory = os.path.join(root, name)
+    if not os.path.isdir(directory):
+        import joblib
+
+        tmp_directory = f"{directory}.tmp-{os.getpid()}"
+        FlatForest.from_model(joblib.load(model_path)).save(tmp_directory)
+        try:
+            os.rename(tmp_directory, directory)
+        except OSError:
+            shutil.rmtree(tmp_directory, ignore_errors=True)
+
+        prune_flat_dirs(root, name, grace_seconds)
+    else:
+        # Marks the arrays as in use, so another worker's prune leaves them for another grace period
+        os.utime(directory)
+
+    return FlatForest.load(directory)
@@ -0,0 +1,114 @@
+import json
+import os
+import re
+from bisect import bisect_left
+from collections import defaultdict
+
+
+def normalize(name):
+    # Case, punctuation and spacing don't matter when matching names
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", name.lower()).split())
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class LocationIndex:
+    """
+    Location names and codes from locations.json, indexed once for
+    lookups:
+
+    - `resolve` maps a name to its code, ignoring case and punctuation.
+    - `search` is typeahead: names with a word starting with the query
+      (a bisect over the sorted word suffixes of every name), then, to
+      fill the limit, the closest names by trigram similarity, so typos
+      still find something.
+    """
+
+    def __init__(self, records, mtime=None):
+        self.names = [record["location"] for record in records]
+        self.codes = [int(record["location_code"]) for record in records]
+        self.mtime = mtime
+        self.by_name = {normalize(name): i for i, name in enumerate(self.names)}
+
+        # "lagos lekki", "lekki" -> both point at "Lagos, Lekki"
+        self.suffixes = sorted(
+            (key[start:], i)
+            for i, key in ((i, normalize(name)) for i, name in enumerate(self.names))
+            for start in [0] + [m.end() for m in re.finditer(" ", key)]
+        )
+        self.suffix_keys = [suffix for suffix, _ in self.suffixes]
+
+        self.grams = [trigrams(normalize(name)) for name in self.names]
+        self.postings = defaultdict(list)
+        for i, grams in enumerate(self.grams):
+            for gram in grams:
+                self.postings[gram].append(i)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as file:
+            return cls(json.load(file), mtime=os.stat(path).st_mtime_ns)
+
+    def __len__(self):
+        return len(self.names)
+
+    def record(self, i, score=None):
+        record = {"location": self.names[i], "location_code": self.codes[i]}
+        if score is not None:
+            record["score"] = round(score, 3)
+        return record
+
+    def match(self, name):
+        # The record whose name equals `name` up to case and punctuation, or None
+        i = self.by_name.get(normalize(name))
+        return None if i is None else self.record(i)
+
+    def resolve(self, name):
+        record = self.match(name)
+        return None if record is None else record["location_code"]
+
+    def prefix(self, query, limit=10):
+        query = normalize(query)
+        matches, seen = [], set()
+        for position in range(bisect_left(self.suffix_keys, query), len(self.suffixes)):
+            suffix, i = self.suffixes[position]
+            if not suffix.startswith(query):
+                break
+            if i not in seen:
+                seen.add(i)
+                matches.append(i)
+            if limit and len(matches) >= limit:
+                break
+        return matches
+
+    def fuzzy(self, query, limit=10, min_score=0.3):
+        # Dice coefficient over trigrams, counted only for names sharing at least one trigram
+        grams = trigrams(normalize(query))
+        shared = defaultdict(int)
+        for gram in grams:
+            for i in self.postings.get(gram, ()):
+                shared[i] += 1
+        scored = sorted(
+            ((2 * count / (len(grams) + len(self.grams[i])), i) for i, count in shared.items()),
+            key=lambda item: (-item[0], self.names[item[1]]),
+        )
+        return [(i, score) for score, i in scored if score >= min_score][:limit or None]
+
+    def search(self, query, limit=10, fuzzy=True):
+        if not normalize(query):
+            everything = sorted(range(len(self.names)), key=lambda i: self.names[i])
+            return [self.record(i) for i in everything[:limit or None]]
+
+        matches = self.prefix(query, limit)
+        results = [self.record(i) for i in matches]
+        if fuzzy and (not limit or len(results) < limit):
+            seen = set(matches)
+            for i, score in self.fuzzy(query, limit):
+                if i not in seen:
+                    results.append(self.record(i, score))
+                if limit and len(results) >= limit:
+                    break
+        return results
@@ -0,0 +1,189 @@
+"""
+Build the listing vector stores offline on a process pool.
+
+Each worker loads the sentence-transformer once and encodes shards of the
+documents, while the parent writes finished shards to Chroma. The log
+reports wall-clock encode throughput and, separately, end-to-end
+throughput including the writes. Use --scaling to compare worker counts
+on the same documents before picking --workers.
+
+Run from project/backend/model:
+    python build_index.py advisor [--workers 8]
+    python build_index.py search --scaling 1,2,4,8
+"""
+import argparse
+import importlib
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from corpus import EMBEDDING_MODEL, MANIFEST_PATH, PERSIST_DIRECTORY, load_manifest, load_text_data, save_manifest
+
+# langchain_chroma's collection name when none is given, which is what house_advisor opens
+ADVISOR_COLLECTION = "langchain"
+# Chroma (SQLite) rejects bigger single writes
+WRITE_BATCH_SIZE = 5000
+
+logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+
+# Set once per worker process by init_worker
+_model = None
+
+
+def init_worker(model_name, threads):
+    global _model
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    # Workers split the cores between them instead of all fighting over every core
+    torch.set_num_threads(threads)
+    _model = SentenceTransformer(model_name, device="cpu")
+
+
+def encode_shard(start, texts, batch_size):
+    # Same input HuggingFaceEmbeddings.embed_documents gives the model, so the vectors match a langchain build
+    texts = [text.replace("\n", " ") for text in texts]
+    vectors = _model.encode(texts, batch_size=batch_size, convert_to_numpy=True, show_progress_bar=False)
+    return start, vectors.astype(np.float32)
+
+
+def embed_parallel(texts, model_name, workers, shard_size, batch_size):
+    """
+    Encode `texts` on `workers` processes, each loading the model once, and
+    yield (start offset, vectors) per shard as soon as it's done so the
+    caller can write while other shards are still encoding.
+    """
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    started = time.perf_counter()
+    # When each shard finished encoding, stamped by the pool rather than when the caller gets to it
+    finished = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(model_name, threads)) as executor:
+        futures = [
+            executor.submit(encode_shard, start, texts[start:start + shard_size], batch_size)
+            for start in range(0, len(texts), shard_size)
+        ]
+        for future in futures:
+            future.add_done_callback(lambda _: finished.append(time.perf_counter()))
+        for future in as_completed(futures):
+            yield future.result()
+
+    if texts:
+        # Wall clock from starting the pool to the last shard, so worker start-up and model loading count too
+        seconds = max(finished) - started
+        logging.info(f"Encoded {len(texts):,} docs in {seconds:.1f}s - {len(texts) / seconds:,.0f} docs/sec on {workers} workers")
+
+
+def measure_scaling(texts, model_name, worker_counts, args):
+    # Encode the same texts (nothing is written) at each worker count and compare wall-clock throughput
+    baseline = None
+    for workers in worker_counts:
+        started = time.perf_counter()
+        for _ in embed_parallel(texts, model_name, workers, args.shard_size, args.batch_size):
+            pass
+        rate = len(texts) / (time.perf_counter() - started)
+        baseline = baseline or rate
+        logging.info(f"Scaling: {workers:>3} workers - {rate:,.0f} docs/sec ({rate / baseline:.2f}x the first run)")
+
+
+def open_collection(persist_directory, name, reset=False):
+    import chromadb
+
+    client = chromadb.PersistentClient(path=persist_directory)
+    if reset and name in [getattr(c, "name", c) for c in client.list_collections()]:
+        client.delete_collection(name)
+    # embedding_function=None as langchain_chroma opens it: vectors always come from our own model
+    return client.get_or_create_collection(name, embedding_function=None)
+
+
+def write_vectors(collection, ids, documents, metadatas, vectors):
+    for start in range(0, len(ids), WRITE_BATCH_SIZE):
+        end = start + WRITE_BATCH_SIZE
+        collection.upsert(
+            ids=ids[start:end],
+            embeddings=vectors[start:end].tolist(),
+            documents=documents[start:end],
+            metadatas=metadatas[start:end],
+        )
+
+
+def build(collection, ids, documents, metadatas, model_name, args):
+    started = time.perf_counter()
+    for start, vectors in embed_parallel(documents, model_name, args.workers, args.shard_size, args.batch_size):
+        end = start + len(vectors)
+        write_vectors(collection, ids[start:end], documents[start:end], metadatas[start:end], vectors)
+
+    seconds = time.perf_counter() - started
+    if documents:
+        logging.info(f"Embedded and stored {len(documents):,} docs in {seconds:.1f}s - {len(documents) / seconds:,.0f} docs/sec end to end")
+
+
+def build_advisor(args):
+    # Same diff house_advisor runs at startup, so it finds nothing left to do afterwards
+    manifest = load_manifest(MANIFEST_PATH)
+    collection = open_collection(PERSIST_DIRECTORY, ADVISOR_COLLECTION, reset=manifest is None or args.rebuild)
+    if args.rebuild:
+        manifest = None
+
+    chunks, ids, removed_ids, manifest = load_text_data(args.data, manifest or {})
+    logging.info(f"{len(chunks):,} new/changed chunks to embed, {len(removed_ids):,} to delete")
+    documents = [chunk.page_content for chunk in chunks]
+    metadatas = [chunk.metadata for chunk in chunks]
+
+    build(collection, ids, documents, metadatas, EMBEDDING_MODEL, args)
+    if removed_ids:
+        collection.delete(ids=removed_ids)
+    save_manifest(manifest, MANIFEST_PATH)
+
+
+def build_search(args):
+    # vector-search.py's persistent index, diffed by line as its embedding_text() does; its load_index() reuses the result
+    vector_search = importlib.import_module("vector-search")
+    texts = [doc.page_content for doc in vector_search.text_splitter(args.input)]
+    state = None if args.rebuild else vector_search.load_state()
+    ids, added, removed_ids, reset = vector_search.diff_index(texts, state)
+    collection = open_collection(vector_search.INDEX_DIR, vector_search.COLLECTION_NAME, reset=reset)
+    logging.info(f"{len(added):,} new/changed lines to embed, {len(removed_ids):,} to delete")
+
+    documents = [texts[i] for i in added]
+    metadatas = [{"source": args.input}] * len(documents)
+    build(collection, [ids[i] for i in added], documents, metadatas, vector_search.MODEL_NAME, args)
+    if removed_ids:
+        collection.delete(ids=removed_ids)
+    vector_search.save_state({**vector_search.corpus_state(args.input), "ids": ids})
+
+
+def scaling_texts(args):
+    # Every document of the target, whatever the manifest or saved index already holds
+    if args.target == "advisor":
+        return [chunk.page_content for chunk in load_text_data(args.data, {})[0]], EMBEDDING_MODEL
+    vector_search = importlib.import_module("vector-search")
+    return [doc.page_content for doc in vector_search.text_splitter(args.input)], vector_search.MODEL_NAME
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("target", choices=["advisor", "search"], help="house_advisor's ./chroma_db or vector-search.py's index")
+    parser.add_argument("--data", default="./data", help="advisor: directory of .txt files")
+    parser.add_argument("--input", default="tagged_description.txt", help="search: one document per line")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--shard-size", type=int, default=2048, help="Documents per task sent to a worker")
+    parser.add_argument("--batch-size", type=int, default=128, help="Documents per model forward pass")
+    parser.add_argument("--rebuild", action="store_true", help="Drop the collection and embed everything")
+    parser.add_argument("--scaling", help="Only measure: encode the target's documents at each of these worker counts (e.g. 1,2,4,8) and write nothing")
+    parser.add_argument("--sample", type=int, default=8192, help="scaling: documents encoded per run")
+    args = parser.parse_args()
+
+    if args.scaling:
+        texts, model_name = scaling_texts(args)
+        measure_scaling(texts[:args.sample], model_name, [int(count) for count in args.scaling.split(",")], args)
+    elif args.target == "advisor":
+        build_advisor(args)
+    else:
+        build_search(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+import pandas as pd
+
+VALID_FURNISHINGS = ["Furnished", "Unfurnished", "Semi-Furnished"]
+
+# "Lekki (Phase 1), Lagos" -> groups ("Lekki", "Phase 1", "Lagos"); same pattern the notebooks used with re.match
+LOCATION_PATTERN = r"^(.+?)\s*\((.*?)\),?\s*(.+)"
+
+
+def _per_unique(values, clean):
+    """
+    Run a vectorized `clean` over the distinct values of a column only and
+    broadcast the result back. Listing columns repeat a few thousand
+    locations and labels across millions of rows, so this keeps the string
+    work proportional to the vocabulary, not the row count.
+    """
+    codes, uniques = pd.factorize(values)
+    cleaned = clean(pd.Series(uniques, dtype=object)).to_numpy(dtype=object)
+    result = pd.Series(cleaned.take(codes), index=values.index, name=values.name, dtype=object)
+    result[codes == -1] = None
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return result.astype("category")
+    return result
+
+
+def extract_amount(prices):
+    # "₦ 1,500,000 p.a." -> 1500000; rows without digits become NaN
+    def extract(values):
+        return values.str.replace(r"[₦,]", "", regex=True).str.extract(r"(\d+)", expand=False)
+
+    return pd.to_numeric(_per_unique(prices.astype(object), extract))
+
+
+def clean_location(locations, strip_ellipsis=False):
+    """
+    Turn "Area (Detail), City" into "City, Area" and leave anything else
+    as is. strip_ellipsis=True also applies the recommender's variant,
+    which stringifies values and drops "..." before matching.
+    """
+    def clean(values):
+        if strip_ellipsis:
+            values = values.astype(str).str.replace("...", "", regex=False).str.strip()
+        parts = values.str.extract(LOCATION_PATTERN)
+        swapped = parts[2] + ", " + parts[0]
+        return swapped.where(parts[0].notna(), values)
+
+    if strip_ellipsis:
+        # str(NaN) is "nan" in the original, so missing values are cleaned too
+        locations = locations.astype(object).where(locations.notna(), "nan")
+    return _per_unique(locations, clean)
+
+
+def clean_furnishing(furnishing):
+    return furnishing.astype(object).where(furnishing.isin(VALID_FURNISHINGS), "Unknown")
+
+
+def convert_bedrooms_bathrooms(values):
+    # "more than 10" -> 11, other values must already be whole numbers
+    def convert(values):
+        text = values.astype(str)
+        more_than = text.str.contains("more than", regex=False)
+        counts = pd.to_numeric(values.where(~more_than, None)).astype("Int64")
+        counts[more_than] = text[more_than].str.split().str[-1].astype("int64") + 1
+        return counts.astype("int64")
+
+    return _per_unique(values.astype(object), convert).astype("int64")
+
+
+def coerce_numeric(df, price_column):
+    # Drop rows whose size or price isn't numeric, then store sqm as whole numbers
+    df = df.copy()
+    df["sqm"] = pd.to_numeric(df["sqm"], errors="coerce")
+    df[price_column] = pd.to_numeric(df[price_column], errors="coerce")
+    df = df.dropna(subset=["sqm", price_column])
+    df["sqm"] = df["sqm"].astype(float).fillna(0).astype(int)
+    # Categories seen only in dropped rows would otherwise still get a code from .cat.codes
+    for column in df.columns:
+        if isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].cat.remove_unused_categories()
+    return df
+
+
+def clean_text(values):
+    # Single-spaced alphanumerics only, as the recommender's clean_text
+    def clean(text):
+        text = text.astype(str).str.replace("\n", " ", regex=False).str.replace("...", "", regex=False)
+        text = text.str.replace(r"[^a-zA-Z0-9\s]", "", regex=True)
+        return text.str.split().str.join(" ")
+
+    return _per_unique(values.astype(object).where(values.notna(), "nan"), clean)
+
+
+def clean_listings(df, price_column="converted_prices"):
+    """
+    The price model's cleaning steps from real_estates.ipynb in one call:
+    numeric price, swapped locations, normalized furnishing, numeric sqm
+    (dropping rows without size or price) and integer bedrooms/bathrooms.
+    """
+    df = df.copy()
+    df[price_column] = extract_amount(df["price"])
+    df["location"] = clean_location(df["location"])
+    df["furnishing"] = clean_furnishing(df["furnishing"])
+    df = coerce_numeric(df, price_column)
+    df["bedrooms"] = convert_bedrooms_bathrooms(df["bedrooms"])
+    df["bathrooms"] = convert_bedrooms_bathrooms(df["bathrooms"])
+    return df
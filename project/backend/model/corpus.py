@@ -0,0 +1,98 @@
+import glob
+import hashlib
+import json
+import os
+from collections import Counter
+
+from langchain_core.documents import Document
+
+# The advisor's Chroma store and the model its chunks are embedded with
+PERSIST_DIRECTORY = "./chroma_db"
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+# Which chunks of which file are in the Chroma collection, so only changed chunks are re-embedded
+MANIFEST_PATH = "chunk_manifest.json"
+CHUNK_SIZE = 1000
+# A line whose hash is divisible by this ends a chunk (~6 listings per chunk)
+CHUNK_LINES = 6
+
+# File hashing to check for changes, streamed so big files aren't read into memory at once
+def hash_file(filepath, block_size=1 << 20):
+    hasher = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+def iter_chunks(filepath):
+    """
+    Group a file's lines (one listing each) into chunks of up to CHUNK_SIZE
+    characters. Boundaries are picked by the content of the lines, not by
+    position, so inserting or deleting a listing only changes the chunk
+    around it and every other chunk keeps its text and its ID.
+    """
+    lines, size = [], 0
+    with open(filepath, encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if not line.strip():
+                continue
+            if lines and size + len(line) > CHUNK_SIZE:
+                yield "\n".join(lines)
+                lines, size = [], 0
+            lines.append(line)
+            size += len(line) + 1
+            if int(hashlib.md5(line.encode("utf-8")).hexdigest(), 16) % CHUNK_LINES == 0:
+                yield "\n".join(lines)
+                lines, size = [], 0
+    if lines:
+        yield "\n".join(lines)
+
+def load_manifest(manifest_path=MANIFEST_PATH):
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path, encoding="utf-8") as f:
+        return json.load(f)
+
+def save_manifest(manifest, manifest_path=MANIFEST_PATH):
+    with open(f"{manifest_path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(f"{manifest_path}.tmp", manifest_path)
+
+def load_text_data(directory, manifest):
+    """
+    Diff the .txt files in `directory` against the manifest. Unchanged files
+    (same hash) aren't even read; changed ones are re-chunked and each
+    chunk gets an ID from its content, so only new chunks need embedding.
+    Returns (new chunk documents, their IDs, IDs to delete, new manifest).
+    """
+    new_documents, new_ids, removed_ids = [], [], []
+    updated = {}
+
+    for file_path in sorted(glob.glob(os.path.join(directory, "*.txt"))):
+        file_hash = hash_file(file_path)
+        entry = manifest.get(file_path)
+        if entry and entry["hash"] == file_hash:
+            updated[file_path] = entry
+            continue
+
+        old_ids = set(entry["chunks"]) if entry else set()
+        ids, occurrences = [], Counter()
+        for chunk in iter_chunks(file_path):
+            digest = hashlib.sha256(f"{file_path}\0{chunk}".encode("utf-8")).hexdigest()[:32]
+            # Identical chunks in one file get -0, -1, ... so IDs stay unique
+            chunk_id = f"{digest}-{occurrences[digest]}"
+            occurrences[digest] += 1
+            ids.append(chunk_id)
+            if chunk_id not in old_ids:
+                new_documents.append(Document(page_content=chunk, metadata={"source": file_path}))
+                new_ids.append(chunk_id)
+
+        removed_ids.extend(old_ids.difference(ids))
+        updated[file_path] = {"hash": file_hash, "chunks": ids}
+
+    # Files that were deleted take their chunks with them
+    for file_path, entry in manifest.items():
+        if file_path not in updated:
+            removed_ids.extend(entry["chunks"])
+
+    return new_documents, new_ids, removed_ids, updated
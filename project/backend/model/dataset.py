@@ -0,0 +1,92 @@
+import csv
+import glob
+import hashlib
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+ESTATES_PATTERN = "../../../data/estates/*.csv"
+CACHE_PATH = "../../../data/cache/estates.pkl"
+
+# Column order of the headerless shards written by the old scraper
+ESTATE_COLUMNS = ['title', 'price', 'location', 'sqm', 'bedrooms', 'furnishing', 'bathrooms', 'description', 'id', 'status']
+# The scraper's CSV header names -> the loaded frame's
+HEADER_RENAMES = {"property_size": "sqm"}
+CATEGORY_COLUMNS = ["location", "furnishing", "status"]
+
+# Bump when the loaded frame changes shape or dtypes, so old caches are ignored
+LOADER_VERSION = 2
+
+
+def shard_has_header(path):
+    # Shards written by the current scraper start with a header row; older ones are bare rows
+    with open(path, newline="", encoding="utf-8") as file:
+        first_row = next(csv.reader(file), [])
+    return "title" in first_row and "price" in first_row
+
+
+def read_shard(path):
+    # The C parser releases the GIL while tokenizing, so shards parse in parallel threads.
+    # (pyarrow's engine can't read the quoted newlines some descriptions contain.)
+    if shard_has_header(path):
+        # Columns are taken by name, whatever order this scraper version wrote them in
+        df = pd.read_csv(path, dtype=str).rename(columns=HEADER_RENAMES)
+        return df.reindex(columns=ESTATE_COLUMNS)
+    return pd.read_csv(path, header=None, names=ESTATE_COLUMNS, dtype=str)
+
+
+def compact_dtypes(df):
+    for column in CATEGORY_COLUMNS:
+        df[column] = df[column].astype("category")
+
+    ids = pd.to_numeric(df["id"], errors="coerce")
+    if ids.notna().all():
+        df["id"] = pd.to_numeric(ids, downcast="integer")
+
+    df["sqm"] = pd.to_numeric(df["sqm"], errors="coerce", downcast="float")
+    return df
+
+
+def shards_fingerprint(paths):
+    # Any added, removed, rewritten or appended-to shard changes the fingerprint
+    state = [(path, os.stat(path).st_mtime_ns, os.stat(path).st_size) for path in paths]
+    return hashlib.sha256(json.dumps([LOADER_VERSION, state]).encode("utf-8")).hexdigest()
+
+
+def load_estates(pattern=ESTATES_PATTERN, cache_path=CACHE_PATH, use_cache=True, max_workers=None):
+    """
+    Load every estates CSV shard matching `pattern` into one frame with
+    compact dtypes (categorical location/furnishing/status, downcast id and
+    sqm). Shards are read in parallel, and the merged frame is cached as a
+    pickle keyed on the shards' paths, mtimes and sizes, so reloads skip
+    the CSV parsing until a shard changes.
+    """
+    paths = sorted(glob.glob(pattern))
+    if not paths:
+        raise FileNotFoundError(f"No CSV shards match {pattern}")
+
+    fingerprint = shards_fingerprint(paths)
+    key_path = f"{cache_path}.key"
+
+    if use_cache and os.path.exists(cache_path) and os.path.exists(key_path):
+        with open(key_path, encoding="utf-8") as file:
+            if file.read().strip() == fingerprint:
+                logging.info(f"Loading cached estates frame from {cache_path}")
+                return pd.read_pickle(cache_path)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        frames = list(executor.map(read_shard, paths))
+
+    df = compact_dtypes(pd.concat(frames, ignore_index=True))
+    logging.info(f"Loaded {len(df)} rows from {len(paths)} shards")
+
+    if use_cache:
+        os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+        df.to_pickle(cache_path)
+        with open(key_path, "w", encoding="utf-8") as file:
+            file.write(fingerprint)
+
+    return df
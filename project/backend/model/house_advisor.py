@@ -1,13 +1,9 @@
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 import os
-import hashlib
 import logging
 from dotenv import load_dotenv
-import pandas as pd
 
-from langchain_community.document_loaders import TextLoader, DirectoryLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_core.documents import Document
 from langchain_chroma import Chroma
@@ -16,6 +12,10 @@ from langchain.chat_models import init_chat_model
 from langchain.chains.summarize import load_summarize_chain
 from langchain.schema import AIMessage
 
+from corpus import EMBEDDING_MODEL, MANIFEST_PATH, PERSIST_DIRECTORY, hash_file, load_manifest, load_text_data, save_manifest
+from hybrid import HybridRetriever
+from numpy_store import NumpyVectorStore
+
 # Load environment variables
 load_dotenv()
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
@@ -28,6 +28,13 @@ app = FastAPI(title="LLM API", description="FastAPI wrapper for LLM-powered AI A
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
+# "chroma" searches the Chroma store; "numpy" an int8 matrix exported from it (see numpy_store.py);
+# "hybrid" filters that matrix by the location/bedrooms in the query and fuses BM25 with it (see hybrid.py)
+RETRIEVER_BACKEND = os.getenv("RETRIEVER_BACKEND", "chroma")
+NUMPY_STORE_DIR = "./numpy_store"
+# Hybrid results are already filtered to the asked-for location/bedrooms, so the top few go to the LLM together
+HYBRID_CONTEXT_DOCS = int(os.getenv("HYBRID_CONTEXT_DOCS", "4"))
+
 llm = init_chat_model("llama-3.3-70b-versatile", model_provider="groq")
 
 template = """You are an AI real-estate agent assistant. Answer the following question in a well-structured way.
@@ -44,62 +51,47 @@ prompt = PromptTemplate(input_variables=["context", "question"], template=templa
 def enrich_prompt(query, context):
     return prompt.format(context=context, question=query)
 
-# File hashing to check for changes
-def hash_file(filepath):
-    hasher = hashlib.sha256()
-    with open(filepath, "rb") as f:
-        hasher.update(f.read())
-    return hasher.hexdigest()
-
-def load_text_data(directory):
-    loader = DirectoryLoader(directory, glob="*.txt", loader_cls=TextLoader)
-    documents = loader.load()
-
-    # Track file hashes
-    hash_file_path = "file_hashes.json"
-    file_hashes = {}
-    
-    if os.path.exists(hash_file_path):
-        file_hashes = pd.read_json(hash_file_path, typ="series").to_dict()
-
-    new_documents = []
-    updated_hashes = {}
-
-    for doc in documents:
-        file_path = doc.metadata["source"]
-        file_hash = hash_file(file_path)
-
-        if file_path not in file_hashes or file_hashes[file_path] != file_hash:
-            new_documents.append(doc)
-            updated_hashes[file_path] = file_hash
-
-    # Save updated hashes
-    if updated_hashes:
-        pd.Series(updated_hashes).to_json(hash_file_path)
-    
-    return new_documents
-
-documents = load_text_data("./data")
-
-if documents:
-    logging.info(f"Found {len(documents)} new/updated documents. Processing embeddings...")
-
-    splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=0)
-    chunks = splitter.split_documents(documents)
-
-    embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-
-    vector_store = Chroma(persist_directory="./chroma_db", embedding_function=embeddings)
-
-    vector_store.add_documents(chunks)
-    vector_store
+ADD_BATCH_SIZE = 1000
+
+def sync_vector_store(vector_store, directory, manifest_path=MANIFEST_PATH):
+    manifest = load_manifest(manifest_path)
+    if manifest is None:
+        manifest = {}
+        # Collections built before the manifest have random IDs (and duplicates); start them over once
+        if vector_store.get(limit=1, include=[])["ids"]:
+            logging.info("Existing collection has no chunk manifest. Rebuilding it once...")
+            vector_store.reset_collection()
+
+    documents, ids, removed_ids, manifest = load_text_data(directory, manifest)
+    if not documents and not removed_ids:
+        logging.info("No new documents found. Using existing embeddings.")
+        return
+
+    logging.info(f"Embedding {len(documents)} new/changed chunks, deleting {len(removed_ids)} stale ones...")
+    for start in range(0, len(documents), ADD_BATCH_SIZE):
+        vector_store.add_documents(documents[start:start + ADD_BATCH_SIZE], ids=ids[start:start + ADD_BATCH_SIZE])
+    if removed_ids:
+        vector_store.delete(ids=removed_ids)
+    # Saved last: if embedding fails halfway, the next run redoes the same diff
+    save_manifest(manifest, manifest_path)
+
+embeddings = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL)
+vector_store = Chroma(persist_directory=PERSIST_DIRECTORY, embedding_function=embeddings)
+sync_vector_store(vector_store, "./data")
+
+if RETRIEVER_BACKEND in ("numpy", "hybrid"):
+    # Re-exported whenever the chunk manifest (and so the collection) changes
+    source = hash_file(MANIFEST_PATH) if os.path.exists(MANIFEST_PATH) else None
+    retriever = NumpyVectorStore.sync_from_chroma(vector_store, NUMPY_STORE_DIR, source, embeddings)
+    if RETRIEVER_BACKEND == "hybrid":
+        retriever = HybridRetriever(retriever)
 else:
-    logging.info("No new documents found. Using existing embeddings.")
-    embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-    vector_store = Chroma(persist_directory="./chroma_db", embedding_function=embeddings)
+    retriever = vector_store
 
 def semantic_search(query, top_k=10):
-    results = vector_store.similarity_search(query, top_k)
+    results = retriever.similarity_search(query, top_k)
+    if RETRIEVER_BACKEND == "hybrid":
+        return "\n\n".join(result.page_content for result in results[:HYBRID_CONTEXT_DOCS])
     return results[0].page_content if results else ""
 
 # Load summarization chain
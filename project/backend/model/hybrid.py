@@ -0,0 +1,170 @@
+import logging
+import math
+import re
+from collections import Counter, defaultdict
+
+import numpy as np
+
+# Reciprocal rank fusion constant from the original RRF paper; damps the weight of the very top ranks
+RRF_K = 60
+# How deep each ranking (BM25, dense) goes before fusing
+FUSION_DEPTH = 50
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+NUMBER_WORDS = {"one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10}
+# "3 bedroom", "Two Bedroom", "4bdrm", "5 bed", "2-bedroom", "3br"
+BEDROOMS = re.compile(r"\b(\d{1,2}|" + "|".join(NUMBER_WORDS) + r")\s*-?\s*(?:bed(?:room)?s?|bdrms?|brs?)\b", re.IGNORECASE)
+# Query words that say nothing about which listing is wanted
+STOPWORDS = {
+    "a", "an", "and", "any", "are", "at", "can", "do", "for", "get", "have", "how", "i", "in", "is", "it", "me",
+    "much", "my", "of", "on", "or", "some", "the", "there", "to", "what", "where", "which", "with", "you",
+}
+
+
+def tokenize(text):
+    return re.findall(r"[a-z0-9]+", text.lower())
+
+
+def bedroom_counts(text):
+    return {int(NUMBER_WORDS.get(count.lower(), count)) for count in BEDROOMS.findall(text)}
+
+
+def place_names(tag):
+    # "Lagos State, Lekki" -> ("lagos state", "lagos", "lekki"); "Rivers State, Port-Harcourt" -> (..., "port harcourt")
+    parts = tag.split(",")
+    # Tags are always "Area, City"; anything else is the tail of a description that happens to contain ": "
+    if len(parts) != 2 or not all(part.strip()[:1].isalpha() for part in parts):
+        return []
+    names = []
+    for part in parts:
+        name = " ".join(tokenize(part))
+        if name:
+            names.append(name)
+            if name.endswith(" state"):
+                names.append(name[:-len(" state")])
+    return names
+
+
+class HybridRetriever:
+    """
+    Retrieval over a NumpyVectorStore's documents that uses the structure
+    already in every tagged_description.txt line, which ends with its
+    location ("...: Asokoro, Abuja") and usually states a bedroom count.
+
+    Place names and bedroom counts in the query are looked up in inverted
+    indexes over the lines; documents with a line matching every filter
+    are the candidates, and only those are scored, both by BM25 over an
+    in-memory term index and by cosine similarity against their rows in
+    the store. The two rankings are merged with reciprocal rank fusion.
+    When a filter matches nothing it is dropped rather than returning no
+    context.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        # Filters are indexed per line (one listing each) so "2 bedrooms in Wuye" can't match a
+        # document where those come from two different listings
+        self.line_documents = []
+        self.places = defaultdict(set)
+        self.bedrooms = defaultdict(set)
+        self.postings = defaultdict(dict)
+        self.lengths = np.zeros(len(store.texts), dtype=np.float32)
+
+        for i, text in enumerate(store.texts):
+            for line in text.splitlines():
+                line_id = len(self.line_documents)
+                self.line_documents.append(i)
+                if ": " in line:
+                    for name in place_names(line.rsplit(": ", 1)[1]):
+                        self.places[name].add(line_id)
+                for count in bedroom_counts(line):
+                    self.bedrooms[count].add(line_id)
+
+            terms = Counter(tokenize(text))
+            self.lengths[i] = sum(terms.values())
+            for term, frequency in terms.items():
+                self.postings[term][i] = frequency
+
+        self.average_length = float(self.lengths.mean()) if len(self.lengths) else 0.0
+        # BM25's length normalization per document, as plain floats: numpy scalars are slow in the scoring loop
+        self.norms = (BM25_K1 * (1 - BM25_B + BM25_B * self.lengths / max(self.average_length, 1e-12))).tolist()
+        # Longest place name in words, so the query scan knows how far to look ahead
+        self.max_place_words = max((len(name.split()) for name in self.places), default=0)
+        logging.info(f"Hybrid index: {len(store.texts):,} documents, {len(self.places):,} place names, {len(self.postings):,} terms")
+
+    def parse_query(self, query):
+        # Place names (longest match first, non-overlapping) and bedroom counts mentioned in the query
+        words = tokenize(query)
+        places, position = [], 0
+        while position < len(words):
+            for size in range(min(self.max_place_words, len(words) - position), 0, -1):
+                name = " ".join(words[position:position + size])
+                if name in self.places and name not in STOPWORDS:
+                    places.append(name)
+                    position += size
+                    break
+            else:
+                position += 1
+        return places, sorted(bedroom_counts(query))
+
+    def candidates(self, places, bedrooms):
+        # Document indices passing the filters, or None for "no filter, search everything"
+        location = None
+        if places:
+            matches = [self.places[name] for name in places]
+            # "Maitama, Abuja" means Maitama; fall back to any of them if nothing is tagged with all
+            location = set.intersection(*matches) or set.union(*matches)
+
+        rooms = set().union(*(self.bedrooms[count] for count in bedrooms)) if bedrooms else None
+        if location is not None and rooms is not None:
+            lines = (location & rooms) or location
+        else:
+            lines = location if location is not None else rooms
+        return None if not lines else {self.line_documents[line] for line in lines}
+
+    def bm25(self, query, candidates, limit=FUSION_DEPTH):
+        terms = [term for term in tokenize(query) if term not in STOPWORDS and term in self.postings]
+        total = len(self.lengths)
+        scores = defaultdict(float)
+        for term in terms:
+            postings = self.postings[term]
+            idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            if candidates is None:
+                matches = postings.items()
+            elif len(candidates) < len(postings):
+                # A narrow filter: look its documents up instead of walking the whole posting list
+                matches = ((i, postings[i]) for i in candidates if i in postings)
+            else:
+                matches = ((i, frequency) for i, frequency in postings.items() if i in candidates)
+            for i, frequency in matches:
+                scores[i] += idf * frequency * (BM25_K1 + 1) / (frequency + self.norms[i])
+        return sorted(scores, key=lambda i: (-scores[i], i))[:limit]
+
+    def dense(self, query, candidates, limit=FUSION_DEPTH):
+        vector = self.store.embedding.embed_query(query)
+        rows = None if candidates is None else sorted(candidates)
+        indices, _ = self.store.search_vectors(vector, limit, rows=rows)[0]
+        return indices.tolist()
+
+    def search(self, query, k=4):
+        # Fused document indices for `query`, best first
+        places, bedrooms = self.parse_query(query)
+        candidates = self.candidates(places, bedrooms)
+        compared = len(self.lengths) if candidates is None else len(candidates)
+        logging.info(f"Query filters: places={places} bedrooms={bedrooms}; scoring {compared:,} of {len(self.lengths):,} documents")
+
+        fused = defaultdict(float)
+        for ranking in (self.bm25(query, candidates), self.dense(query, candidates)):
+            for rank, i in enumerate(ranking):
+                fused[i] += 1 / (RRF_K + rank + 1)
+        return sorted(fused, key=lambda i: (-fused[i], i))[:k]
+
+    def similarity_search(self, query, k=4):
+        # Same call shape as Chroma.similarity_search, so it can stand in for it
+        from langchain_core.documents import Document
+
+        return [
+            Document(page_content=self.store.texts[i], metadata=self.store.metadatas[i], id=self.store.ids[i])
+            for i in self.search(query, k)
+        ]
@@ -0,0 +1,189 @@
+"""
+Cross-validated, parallel search over the price model families. Writes a
+leaderboard CSV and leaves the feature store and locations.json alone
+unless --update-features is given.
+
+Run from project/backend/model: python model_search.py [--folds 5] [--sample 50000]
+"""
+import argparse
+import glob
+import itertools
+import logging
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+from sklearn.metrics import mean_absolute_error
+from sklearn.model_selection import KFold
+
+from dataset import ESTATES_PATTERN, read_shard
+from train import FEATURE_STORE_PATH, FEATURES, TARGET, LocationCodes, build_features, update_feature_store
+
+try:
+    import xgboost as xgb
+except ImportError:
+    xgb = None
+
+LEADERBOARD_PATH = "leaderboard.csv"
+
+# The notebook's four families, each around the settings it used
+SEARCH_SPACE = {
+    "Linear Regression": (LinearRegression, {}),
+    "Random Forest Regression": (RandomForestRegressor, {
+        "n_estimators": [100, 200],
+        "max_depth": [None, 20],
+        "min_samples_leaf": [1, 5],
+        "random_state": [42],
+    }),
+    "Gradient Boosting": (GradientBoostingRegressor, {
+        "n_estimators": [200],
+        "learning_rate": [0.05, 0.1],
+        "max_depth": [3, 5],
+        "random_state": [42],
+    }),
+}
+if xgb is not None:
+    SEARCH_SPACE["XGBoost"] = (xgb.XGBRegressor, {
+        "n_estimators": [200, 400],
+        "learning_rate": [0.05, 0.1],
+        "max_depth": [6, 8],
+        "random_state": [42],
+    })
+
+logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+
+# Set once per worker process by load_shared
+_shared = {}
+
+
+def candidates(space=SEARCH_SPACE):
+    for name, (_, grid) in space.items():
+        keys = list(grid)
+        for values in itertools.product(*(grid[key] for key in keys)):
+            yield name, dict(zip(keys, values))
+
+
+def share_arrays(store, folds, directory):
+    """
+    Encode X, y and the fold assignment once and save them as .npy files.
+    Workers open them with mmap_mode="r", so every process reads the same
+    page-cache pages instead of unpickling its own copy of the data.
+    """
+    X = store[FEATURES].to_numpy(dtype=np.float64)
+    y = store[TARGET].to_numpy(dtype=np.float64)
+    fold_ids = np.empty(len(y), dtype=np.int8)
+    for fold, (_, test_index) in enumerate(KFold(n_splits=folds, shuffle=True, random_state=42).split(X)):
+        fold_ids[test_index] = fold
+
+    for name, array in (("X", X), ("y", y), ("folds", fold_ids)):
+        np.save(os.path.join(directory, f"{name}.npy"), array)
+
+
+def load_shared(directory):
+    for name in ("X", "y", "folds"):
+        _shared[name] = np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r")
+
+
+def evaluate(name, params):
+    # Runs in a worker: cross-validate one candidate on the shared arrays
+    estimator_class = SEARCH_SPACE[name][0]
+    X, y, fold_ids = _shared["X"], _shared["y"], _shared["folds"]
+
+    maes, fit_seconds, predict_ms = [], [], []
+    for fold in range(int(fold_ids.max()) + 1):
+        test = fold_ids == fold
+        # n_jobs=1: the pool already keeps every core busy with one candidate each
+        model = estimator_class(**params)
+        if "n_jobs" in model.get_params():
+            model.set_params(n_jobs=1)
+
+        start = time.perf_counter()
+        model.fit(X[~test], y[~test])
+        fit_seconds.append(time.perf_counter() - start)
+
+        X_test = X[test]
+        start = time.perf_counter()
+        predictions = model.predict(X_test)
+        predict_ms.append((time.perf_counter() - start) * 1000 / len(X_test))
+        maes.append(mean_absolute_error(y[test], predictions))
+
+    return {
+        "model": name,
+        "params": params,
+        "mae": float(np.mean(maes)),
+        "mae_std": float(np.std(maes)),
+        "fit_seconds": float(np.mean(fit_seconds)),
+        "predict_ms_per_row": float(np.mean(predict_ms)),
+    }
+
+
+def search(store, folds=5, workers=None):
+    jobs = list(candidates())
+    logging.info(f"Searching {len(jobs)} candidates x {folds} folds on {len(store)} listings")
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="model_search_") as directory:
+        share_arrays(store, folds, directory)
+        with ProcessPoolExecutor(max_workers=workers, initializer=load_shared, initargs=(directory,)) as executor:
+            futures = [executor.submit(evaluate, name, params) for name, params in jobs]
+            for future in as_completed(futures):
+                result = future.result()
+                logging.info(f"{result['model']} {result['params']} - MAE: ₦{result['mae']:,.2f}")
+                results.append(result)
+
+    leaderboard = pd.DataFrame(results).sort_values("mae", ignore_index=True)
+    leaderboard["params"] = leaderboard["params"].astype(str)
+    return leaderboard
+
+
+def load_features(pattern, update=False):
+    """
+    The listings to search on. By default this only reads: the feature
+    store train.py keeps, or, if there is none yet, features built in
+    memory from the shards (with the codes in locations.json, which is
+    left untouched). update=True refreshes the store first, exactly as a
+    train.py run would.
+    """
+    if update:
+        return update_feature_store(pattern)[0]
+    if os.path.exists(FEATURE_STORE_PATH):
+        return pd.read_pickle(FEATURE_STORE_PATH)
+
+    paths = sorted(glob.glob(pattern))
+    if not paths:
+        raise FileNotFoundError(f"No feature store at {FEATURE_STORE_PATH} and no CSV shards match {pattern}")
+    logging.info(f"No feature store at {FEATURE_STORE_PATH}; building features in memory")
+    raw = pd.concat([read_shard(path) for path in paths], ignore_index=True)
+    return build_features(raw.drop_duplicates(subset=["id"], keep="last"), LocationCodes())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", default=ESTATES_PATTERN, help="Glob of the estates CSV shards (read when there is no feature store, or with --update-features)")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--sample", type=int, default=None, help="Search on a random sample of this many listings")
+    parser.add_argument("--output", default=LEADERBOARD_PATH)
+    parser.add_argument("--update-features", action="store_true", help="Refresh the feature store and locations.json from the shards first")
+    args = parser.parse_args()
+
+    if xgb is None:
+        logging.warning("xgboost is not installed; skipping the XGBoost candidates")
+
+    store = load_features(args.data, update=args.update_features)
+    if args.sample and args.sample < len(store):
+        store = store.sample(args.sample, random_state=42)
+
+    leaderboard = search(store, args.folds, args.workers)
+    leaderboard.to_csv(args.output, index=False)
+    print(leaderboard.to_string(index=False))
+    logging.info(f"Leaderboard saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
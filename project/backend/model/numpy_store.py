@@ -0,0 +1,210 @@
+import json
+import logging
+import os
+import shutil
+
+import numpy as np
+
+# Rows scored per matmul: bounds the float32 temporary to ~16 MB for 768-dim vectors
+BLOCK_ROWS = 8192
+# Largest store kept as a float32 working copy in RAM (~75 MB for 25k x 768); bigger ones are
+# converted block by block on every search instead
+WORKING_COPY_MAX_BYTES = 256 * 1024 * 1024
+
+
+def normalize_rows(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def top_k(scores, k):
+    # Indices of the k best scores, best first, without sorting everything
+    k = min(k, len(scores))
+    best = np.argpartition(-scores, k - 1)[:k]
+    return best[np.argsort(-scores[best], kind="stable")]
+
+
+class NumpyVectorStore:
+    """
+    Exact cosine top-k over a memory-mapped embedding matrix, for corpora
+    small enough (tens of thousands of listings) that a brute-force BLAS
+    matmul beats building and loading an HNSW index.
+
+    Vectors are L2-normalized and stored as int8 (1 byte per dimension
+    plus one float32 scale per row) or float16 (2 bytes). With int8 the
+    search is done on the quantized matrix and the best `rescore_factor *
+    k` candidates are re-scored against a float16 copy, which only pages
+    in those rows; that copy makes an int8 store 3 bytes per dimension on
+    disk, so build with `rescore_copy=False` when disk matters more than
+    the last bit of recall.
+
+    The first full scan dequantizes the matrix once into a float32
+    working copy if it fits in `working_copy_max_bytes`, so later queries
+    are a single matmul; larger stores are converted block by block per
+    search. Texts and metadata sit in a JSON file next to the arrays.
+    """
+
+    def __init__(self, directory, embedding=None, working_copy_max_bytes=WORKING_COPY_MAX_BYTES):
+        self.directory = directory
+        self.embedding = embedding
+        self.working_copy_max_bytes = working_copy_max_bytes
+        self.working = None
+        with open(os.path.join(directory, "meta.json"), encoding="utf-8") as file:
+            self.meta = json.load(file)
+        with open(os.path.join(directory, "documents.json"), encoding="utf-8") as file:
+            documents = json.load(file)
+        self.ids = documents["ids"]
+        self.texts = documents["texts"]
+        self.metadatas = documents["metadatas"]
+
+        self.vectors = np.load(os.path.join(directory, "vectors.npy"), mmap_mode="r")
+        self.scales = None
+        self.full = None
+        if self.meta["dtype"] == "int8":
+            self.scales = np.load(os.path.join(directory, "scales.npy"))
+            if self.meta.get("rescore_copy", True):
+                self.full = np.load(os.path.join(directory, "full.npy"), mmap_mode="r")
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def build(cls, directory, ids, texts, metadatas, vectors, dtype="int8", source=None, rescore_copy=True):
+        """
+        Write a store to `directory` (replacing any old one) and return it.
+        `source` is an opaque fingerprint of what the vectors came from,
+        used by sync_from_chroma to tell whether the store is stale.
+        `rescore_copy` keeps the float16 copy int8 stores re-score with.
+        """
+        if dtype not in ("int8", "float16"):
+            raise ValueError(f"Unsupported dtype {dtype!r}; use int8 or float16")
+
+        # An empty collection has no dimension to reshape to
+        vectors = normalize_rows(np.asarray(vectors, dtype=np.float32).reshape(len(ids), -1) if len(ids) else np.zeros((0, 0)))
+        rescore_copy = rescore_copy and dtype == "int8"
+        tmp_directory = f"{directory}.tmp-{os.getpid()}"
+        os.makedirs(tmp_directory, exist_ok=True)
+
+        if dtype == "int8":
+            # Symmetric per-row quantization: row = scale * int8 values
+            scales = np.maximum(np.abs(vectors).max(axis=1, initial=0), 1e-12) / 127
+            quantized = np.round(vectors / scales[:, None]).astype(np.int8)
+            np.save(os.path.join(tmp_directory, "vectors.npy"), quantized)
+            np.save(os.path.join(tmp_directory, "scales.npy"), scales.astype(np.float32))
+            if rescore_copy:
+                np.save(os.path.join(tmp_directory, "full.npy"), vectors.astype(np.float16))
+        else:
+            np.save(os.path.join(tmp_directory, "vectors.npy"), vectors.astype(np.float16))
+
+        with open(os.path.join(tmp_directory, "documents.json"), "w", encoding="utf-8") as file:
+            json.dump({"ids": list(ids), "texts": list(texts), "metadatas": [m or {} for m in metadatas]}, file)
+        meta = {"dtype": dtype, "count": len(vectors), "dim": int(vectors.shape[1]), "rescore_copy": rescore_copy, "source": source}
+        with open(os.path.join(tmp_directory, "meta.json"), "w", encoding="utf-8") as file:
+            json.dump(meta, file)
+
+        shutil.rmtree(directory, ignore_errors=True)
+        os.replace(tmp_directory, directory)
+        return cls(directory)
+
+    @classmethod
+    def sync_from_chroma(cls, vector_store, directory, source, embedding=None, dtype="int8", rescore_copy=True):
+        """
+        The store in `directory` if it was exported from `source`, otherwise
+        a fresh export of every vector already in the Chroma store (nothing
+        is re-embedded).
+        """
+        meta_path = os.path.join(directory, "meta.json")
+        if os.path.exists(meta_path):
+            with open(meta_path, encoding="utf-8") as file:
+                meta = json.load(file)
+            wanted = rescore_copy and dtype == "int8"
+            if meta.get("source") == source and meta.get("dtype") == dtype and meta.get("rescore_copy", dtype == "int8") == wanted:
+                return cls(directory, embedding)
+
+        data = vector_store.get(include=["embeddings", "documents", "metadatas"])
+        logging.info(f"Exporting {len(data['ids'])} vectors from Chroma to {directory} ({dtype})")
+        store = cls.build(directory, data["ids"], data["documents"], data["metadatas"], data["embeddings"], dtype, source, rescore_copy)
+        store.embedding = embedding
+        return store
+
+    def _working_copy(self):
+        # Dequantized float32 matrix, made once if it fits the budget, else None
+        if self.working is None and len(self) * self.meta["dim"] * 4 <= self.working_copy_max_bytes:
+            working = np.empty((len(self), self.meta["dim"]), dtype=np.float32)
+            for start in range(0, len(self), BLOCK_ROWS):
+                working[start:start + BLOCK_ROWS] = self.vectors[start:start + BLOCK_ROWS]
+            if self.scales is not None:
+                working *= self.scales[:, None]
+            self.working = working
+        return self.working
+
+    def _scores(self, queries, rows=None):
+        # Cosine scores of normalized queries (m x d) against all rows, or only `rows`
+        if rows is not None:
+            if self.full is not None:
+                return np.asarray(self.full[rows], dtype=np.float32) @ queries.T
+            if self.working is not None:
+                return self.working[rows] @ queries.T
+            scores = np.asarray(self.vectors[rows], dtype=np.float32) @ queries.T
+            return scores * self.scales[rows, None] if self.scales is not None else scores
+
+        working = self._working_copy()
+        if working is not None:
+            return working @ queries.T
+
+        scores = np.empty((len(self), len(queries)), dtype=np.float32)
+        for start in range(0, len(self), BLOCK_ROWS):
+            block = np.asarray(self.vectors[start:start + BLOCK_ROWS], dtype=np.float32)
+            scores[start:start + len(block)] = block @ queries.T
+        if self.scales is not None:
+            scores *= self.scales[:, None]
+        return scores
+
+    def search_vectors(self, queries, k=10, rescore=True, rescore_factor=4, rows=None):
+        """
+        Top-k rows for each query vector: a list of (indices, scores) pairs,
+        best first. Many queries at once share one matmul per block. With
+        `rows` (row indices, e.g. from a pre-filter) only those rows are
+        scored, at full precision, so there is nothing to re-score.
+        """
+        queries = normalize_rows(np.atleast_2d(queries))
+        if rows is not None:
+            rows = np.sort(np.asarray(rows, dtype=np.int64))
+        if not len(self) or (rows is not None and not len(rows)):
+            return [(np.array([], dtype=np.int64), np.array([], dtype=np.float32)) for _ in queries]
+
+        if rows is not None:
+            scores = self._scores(queries, rows)
+            results = []
+            for column in range(len(queries)):
+                best = top_k(scores[:, column], k)
+                results.append((rows[best], scores[best, column]))
+            return results
+
+        scores = self._scores(queries)
+        results = []
+        for column, query in enumerate(queries):
+            if rescore and self.full is not None:
+                candidates = np.sort(top_k(scores[:, column], k * rescore_factor))
+                exact = self._scores(query[None, :], candidates)[:, 0]
+                order = top_k(exact, k)
+                results.append((candidates[order], exact[order]))
+            else:
+                best = top_k(scores[:, column], k)
+                results.append((best, scores[best, column]))
+        return results
+
+    def similarity_search_with_score(self, query, k=4, rescore=True):
+        from langchain_core.documents import Document
+
+        indices, scores = self.search_vectors(self.embedding.embed_query(query), k, rescore)[0]
+        return [
+            (Document(page_content=self.texts[i], metadata=self.metadatas[i], id=self.ids[i]), float(score))
+            for i, score in zip(indices, scores)
+        ]
+
+    def similarity_search(self, query, k=4, rescore=True):
+        # Same call shape as Chroma.similarity_search, so it can stand in for it
+        return [document for document, _ in self.similarity_search_with_score(query, k, rescore)]
+
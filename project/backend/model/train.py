@@ -0,0 +1,213 @@
+"""
+Fold new and changed estates shards into the feature store, retrain the
+price model when there are new listings and publish it as a new version.
+
+Run from project/backend/model: python train.py [--force]
+"""
+import argparse
+import glob
+import json
+import logging
+import os
+import shutil
+import time
+
+import joblib
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import mean_absolute_error
+from sklearn.model_selection import train_test_split
+
+from cleaning import clean_listings
+from dataset import ESTATES_PATTERN, read_shard
+
+FEATURE_STORE_PATH = "../../../data/features/estates_features.pkl"
+STATE_PATH = "../../../data/features/state.json"
+LOCATIONS_PATH = "locations.json"
+VERSIONS_DIR = "versions"
+MODEL_PATH = "price_prediction_model.pkl"
+
+FEATURES = ["location_code", "sqm", "bathrooms", "bedrooms", "furnishing_code"]
+TARGET = "current_prices"
+
+# Same codes LabelEncoder gave the notebook: 0 = Furnished, 1 = Semi-Furnished, 2 = Unfurnished
+FURNISHING_CODES = {"Furnished": 0, "Semi-Furnished": 1, "Unfurnished": 2, "Unknown": 3}
+
+logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+
+
+class LocationCodes:
+    """
+    Location name -> code mapping backed by locations.json. Existing codes
+    never change; a location seen for the first time gets the next free
+    code, so a retrain can't silently renumber what the model and the
+    frontend already use (as astype("category").cat.codes did).
+    """
+
+    def __init__(self, path=LOCATIONS_PATH):
+        self.path = path
+        self.codes = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as file:
+                self.codes = {item["location"]: int(item["location_code"]) for item in json.load(file)}
+        self.added = 0
+
+    def encode(self, locations):
+        next_code = max(self.codes.values(), default=-1) + 1
+        for location in pd.unique(locations):
+            if location not in self.codes:
+                self.codes[location] = next_code
+                next_code += 1
+                self.added += 1
+        return locations.map(self.codes).astype("int64")
+
+    def save(self):
+        records = pd.DataFrame(
+            sorted(self.codes.items(), key=lambda item: item[1]), columns=["location", "location_code"]
+        )
+        write_atomic(self.path, records.to_json(orient="records", indent=4))
+
+
+def write_atomic(path, text):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        file.write(text)
+    os.replace(tmp_path, path)
+
+
+def shard_state(path):
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def load_json(path, default):
+    if not os.path.exists(path):
+        return default
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def valid_counts(values):
+    # Rows convert_bedrooms_bathrooms can parse: whole numbers or "more than N"
+    text = values.astype(str).str.strip()
+    return text.str.fullmatch(r"\d+(\.0+)?|more than \d+")
+
+
+def build_features(raw, locations):
+    raw = raw[valid_counts(raw["bedrooms"]) & valid_counts(raw["bathrooms"])]
+    df = clean_listings(raw, price_column=TARGET)
+    df["id"] = pd.to_numeric(df["id"], errors="coerce")
+    df = df.dropna(subset=["id"])
+    df["location_code"] = locations.encode(df["location"].astype(str))
+    df["furnishing_code"] = df["furnishing"].map(FURNISHING_CODES).astype("int64")
+    return df[["id", "location"] + FEATURES + [TARGET]]
+
+
+def update_feature_store(pattern=ESTATES_PATTERN, store_path=FEATURE_STORE_PATH, state_path=STATE_PATH, locations=None):
+    """
+    Clean and encode only what changed since the last run: shards that are
+    new or whose mtime/size moved, and within them only listing ids that
+    aren't in the store yet. Returns (store, number of new rows).
+    """
+    locations = locations or LocationCodes()
+    state = load_json(state_path, {})
+    store = pd.read_pickle(store_path) if os.path.exists(store_path) else None
+
+    paths = sorted(glob.glob(pattern))
+    changed = [path for path in paths if state.get(path) != shard_state(path)]
+    logging.info(f"{len(changed)} of {len(paths)} shards changed since the last run")
+
+    new_rows = 0
+    if changed:
+        raw = pd.concat([read_shard(path) for path in changed], ignore_index=True)
+        raw = raw.drop_duplicates(subset=["id"], keep="last")
+        if store is not None:
+            known = set(store["id"].astype("int64"))
+            ids = pd.to_numeric(raw["id"], errors="coerce")
+            raw = raw[~ids.isin(known)]
+
+        features = build_features(raw, locations)
+        new_rows = len(features)
+        store = features if store is None else pd.concat([store, features], ignore_index=True)
+        logging.info(f"Added {new_rows} new listings ({locations.added} new locations)")
+
+        os.makedirs(os.path.dirname(store_path) or ".", exist_ok=True)
+        store.to_pickle(f"{store_path}.tmp")
+        os.replace(f"{store_path}.tmp", store_path)
+        locations.save()
+        write_atomic(state_path, json.dumps({path: shard_state(path) for path in paths}, indent=2))
+
+    if store is None:
+        raise FileNotFoundError(f"No listings found for {pattern}")
+    return store, new_rows
+
+
+def train_model(store, test_size=0.2, random_state=42):
+    X = store[FEATURES]
+    y = store[TARGET]
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=random_state)
+
+    model = RandomForestRegressor(n_estimators=100, random_state=random_state, n_jobs=-1)
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
+
+    metrics = {
+        "mae": float(mean_absolute_error(y_test, model.predict(X_test))),
+        "train_rows": len(X_train),
+        "test_rows": len(X_test),
+        "fit_seconds": round(fit_seconds, 3),
+    }
+    return model, metrics
+
+
+def publish_model(model, metrics, new_rows, versions_dir=VERSIONS_DIR, model_path=MODEL_PATH):
+    # versions/<version>/ keeps every artifact with its metrics; price_prediction_model.pkl is the live copy
+    # Written under a hidden, per-process name and renamed, so a service watching versions/ never sees half an artifact
+    tmp_dir = os.path.join(versions_dir, f".publish-{os.getpid()}-{time.time_ns()}.tmp")
+    os.makedirs(tmp_dir)
+
+    artifact_path = os.path.join(tmp_dir, MODEL_PATH)
+    joblib.dump(model, artifact_path)
+    metadata = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "features": FEATURES,
+        "new_rows": new_rows,
+        "metrics": metrics,
+    }
+    while True:
+        # Microsecond names sort in publish order; a publish that lands on a taken name just takes the next one
+        now = time.time()
+        version = f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(now))}-{int(now % 1 * 1_000_000):06d}"
+        write_atomic(os.path.join(tmp_dir, "metadata.json"), json.dumps({"version": version, **metadata}, indent=2))
+        version_dir = os.path.join(versions_dir, version)
+        try:
+            os.rename(tmp_dir, version_dir)
+            break
+        except OSError:
+            if not os.path.exists(version_dir):
+                raise
+
+    shutil.copyfile(os.path.join(version_dir, MODEL_PATH), f"{model_path}.tmp-{os.getpid()}")
+    os.replace(f"{model_path}.tmp-{os.getpid()}", model_path)
+    return version
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incrementally update the feature store and retrain the price model.")
+    parser.add_argument("--data", default=ESTATES_PATTERN, help="Glob of the estates CSV shards")
+    parser.add_argument("--force", action="store_true", help="Retrain even if no new listings were found")
+    args = parser.parse_args()
+
+    store, new_rows = update_feature_store(args.data)
+    if not new_rows and not args.force and os.path.exists(MODEL_PATH):
+        logging.info("No new listings; keeping the current model")
+        return
+
+    model, metrics = train_model(store)
+    version = publish_model(model, metrics, new_rows)
+    logging.info(f"Published model {version} trained on {len(store)} listings - MAE: ₦{metrics['mae']:,.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,20 @@
 from langchain_community.document_loaders import TextLoader
 from langchain_text_splitters import CharacterTextSplitter
-from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_chroma import Chroma
+from langchain_core.embeddings import Embeddings
+from langchain.embeddings import CacheBackedEmbeddings
+from langchain.storage import LocalFileStore
 
 import pandas as pd
 import os
+import json
+import hashlib
 import logging
+from collections import Counter
 from dotenv import load_dotenv
 
+from numpy_store import NumpyVectorStore
+
 
 OPEN_AI_KEY = os.getenv("OPEN_AI_KEY")
 
@@ -15,6 +22,109 @@ load_dotenv()
 
 logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 
+MODEL_NAME = "sentence-transformers/all-mpnet-base-v2"
+# Embeddings on disk keyed by model name + text hash, reused by every run and every rebuild
+EMBEDDING_CACHE_DIR = "./embedding_cache"
+# Persistent Chroma index, plus the corpus/model it was built from and the ID of every line in it
+INDEX_DIR = "./house_vector_db"
+INDEX_STATE_PATH = os.path.join(INDEX_DIR, "corpus.json")
+COLLECTION_NAME = "houses"
+# "chroma" queries the Chroma index; "numpy" an int8 matrix exported from it (see numpy_store.py)
+RETRIEVER_BACKEND = os.getenv("RETRIEVER_BACKEND", "chroma")
+NUMPY_INDEX_DIR = "./house_numpy_index"
+ADD_BATCH_SIZE = 1000
+
+class LazyEmbeddings(Embeddings):
+    # Loads the sentence-transformer (and torch) on first use only; cache hits never need it
+    def __init__(self, model_name):
+        self.model_name = model_name
+        self._model = None
+
+    @property
+    def model(self):
+        if self._model is None:
+            from langchain_huggingface import HuggingFaceEmbeddings
+            logging.info(f"Loading embedding model {self.model_name}...")
+            self._model = HuggingFaceEmbeddings(model_name=self.model_name)
+        return self._model
+
+    def embed_documents(self, texts):
+        return self.model.embed_documents(texts)
+
+    def embed_query(self, text):
+        return self.model.embed_query(text)
+
+def cached_embeddings(model_name=MODEL_NAME, cache_dir=EMBEDDING_CACHE_DIR):
+    return CacheBackedEmbeddings.from_bytes_store(
+        LazyEmbeddings(model_name),
+        LocalFileStore(cache_dir),
+        namespace=model_name,
+        query_embedding_cache=True,
+    )
+
+def corpus_state(input_file="tagged_description.txt", model_name=MODEL_NAME):
+    hasher = hashlib.sha256()
+    with open(input_file, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            hasher.update(block)
+    return {"model": model_name, "corpus": hasher.hexdigest()}
+
+def load_state():
+    if not os.path.exists(INDEX_STATE_PATH):
+        return None
+    with open(INDEX_STATE_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+def save_state(state):
+    with open(f"{INDEX_STATE_PATH}.tmp", "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(f"{INDEX_STATE_PATH}.tmp", INDEX_STATE_PATH)
+
+def line_ids(texts):
+    # IDs from each line's content, so an unchanged listing keeps its ID wherever it moves in the file;
+    # identical lines get -0, -1, ... so IDs stay unique
+    ids, occurrences = [], Counter()
+    for text in texts:
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+        ids.append(f"{digest}-{occurrences[digest]}")
+        occurrences[digest] += 1
+    return ids
+
+def diff_index(texts, state, model_name=MODEL_NAME):
+    """
+    Compare the corpus lines with the IDs the saved index was built from.
+    Returns (IDs of every line, positions of lines to embed, IDs to delete,
+    whether the collection must be emptied first). An index from another
+    model, or from before IDs were recorded, is rebuilt once.
+    """
+    ids = line_ids(texts)
+    if state is None or state.get("model") != model_name or "ids" not in state:
+        return ids, list(range(len(ids))), [], True
+    old_ids = set(state["ids"])
+    added = [position for position, line_id in enumerate(ids) if line_id not in old_ids]
+    return ids, added, sorted(old_ids.difference(ids)), False
+
+def open_index(embeddings):
+    return Chroma(collection_name=COLLECTION_NAME, persist_directory=INDEX_DIR, embedding_function=embeddings)
+
+def load_index(input_file="tagged_description.txt"):
+    # The saved index if it was built from this exact corpus and model, otherwise None
+    state = load_state()
+    current = corpus_state(input_file)
+    if state is None or "ids" not in state or (state["model"], state["corpus"]) != (current["model"], current["corpus"]):
+        return None
+    house_vector_db = open_index(cached_embeddings())
+    if not house_vector_db.get(limit=1, include=[])["ids"]:
+        return None
+    logging.info("Corpus unchanged. Reusing the saved vector index.")
+    return house_vector_db
+
+def text_file_stale(csv_file="house_cleaned.csv", output_file="tagged_description.txt"):
+    # Regenerated only when missing or older than the CSV, so an unchanged corpus keeps its hash
+    if not os.path.exists(output_file):
+        return True
+    return os.path.exists(csv_file) and os.path.getmtime(csv_file) > os.path.getmtime(output_file)
+
 def convert_to_text_file(csv_file="house_cleaned.csv", output_file="tagged_description.txt"):
     try:
         houses = pd.read_csv(csv_file)
@@ -35,11 +145,24 @@ def text_splitter(input_file="tagged_description.txt"):
         return []
 
 
-def embedding_text(documents):
+def embedding_text(documents, input_file="tagged_description.txt"):
+    # Brings the saved index up to date with `documents`: only new or changed lines are embedded
+    # (and those an earlier run already embedded come from the cache), removed lines are deleted
     try:
-        embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-mpnet-base-v2")
-        house_vector_db = Chroma(embedding_function=embeddings)
-        house_vector_db.add_documents(documents=documents)
+        house_vector_db = open_index(cached_embeddings())
+        ids, added, removed_ids, reset = diff_index([doc.page_content for doc in documents], load_state())
+        if reset:
+            logging.info("Saved index has no line IDs for this model. Rebuilding it once...")
+            house_vector_db.reset_collection()
+        logging.info(f"Embedding {len(added)} new/changed lines, deleting {len(removed_ids)} stale ones...")
+
+        for start in range(0, len(added), ADD_BATCH_SIZE):
+            batch = added[start:start + ADD_BATCH_SIZE]
+            house_vector_db.add_documents(documents=[documents[i] for i in batch], ids=[ids[i] for i in batch])
+        if removed_ids:
+            house_vector_db.delete(ids=removed_ids)
+        # Saved last: if embedding fails halfway, the next run redoes the same diff
+        save_state({**corpus_state(input_file), "ids": ids})
         logging.info("Documents successfully embedded in vector database.")
         return house_vector_db
     except Exception as e:
@@ -47,13 +170,20 @@ def embedding_text(documents):
         return None
 
 def main():
-    convert_to_text_file()
-    splitted_document = text_splitter()
-    if not splitted_document:  # Check if documents were successfully split
-        logging.error("No documents to embed. Exiting...")
-        return
-    
-    house_db = embedding_text(splitted_document)
+    if text_file_stale():
+        convert_to_text_file()
+    house_db = load_index()
+
+    if house_db is None:
+        splitted_document = text_splitter()
+        if not splitted_document:  # Check if documents were successfully split
+            logging.error("No documents to embed. Exiting...")
+            return
+
+        house_db = embedding_text(splitted_document)
+
+    if house_db and RETRIEVER_BACKEND == "numpy":
+        house_db = NumpyVectorStore.sync_from_chroma(house_db, NUMPY_INDEX_DIR, corpus_state()["corpus"], house_db.embeddings)
 
     if house_db:
         query = "Where can I get a house in Maitama?"
@@ -0,0 +1,224 @@
+import asyncio
+import json
+import logging
+import os
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from inference import FlatForest, load_shared_forest
+
+ARTIFACT_NAME = "price_prediction_model.pkl"
+# Versions rolled back by any worker, in the versions directory so every worker and restart honours them
+ROLLBACK_FILE = ".rolled_back.json"
+
+# location_code, sqm, bathrooms, bedrooms, furnishing_code rows every new model must score before it goes live
+WARMUP_ROWS = np.array([
+    [5, 300, 3, 3, 0],
+    [64, 120, 2, 2, 1],
+    [266, 650, 5, 4, 2],
+    [0, 50, 1, 1, 3],
+], dtype=np.float64)
+
+
+class LoadedModel:
+    # One loaded artifact and the engine settings it predicts with
+
+    def __init__(self, version, path, features, model=None, flat=None, flat_max_rows=256, metadata=None):
+        self.version = version
+        self.path = path
+        self.features = features
+        self.model = model
+        self.flat = flat
+        self.flat_max_rows = flat_max_rows
+        self.metadata = metadata or {}
+        self.loaded_at = time.strftime("%Y-%m-%dT%H:%M:%S")
+
+    def predict(self, matrix):
+        if self.flat is not None and (self.model is None or len(matrix) <= self.flat_max_rows):
+            return self.flat.predict(matrix)
+        return self.model.predict(pd.DataFrame(matrix, columns=self.features))
+
+
+def load_model(path, version, features, load_mode="joblib", engine="sklearn", flat_root=None, flat_max_rows=256):
+    metadata_path = os.path.join(os.path.dirname(path), "metadata.json")
+    metadata = {}
+    if os.path.exists(metadata_path):
+        with open(metadata_path, encoding="utf-8") as file:
+            metadata = json.load(file)
+        if metadata.get("features", features) != features:
+            raise ValueError(f"Model {version} was trained on {metadata['features']}, expected {features}")
+
+    if load_mode == "mmap":
+        # No sklearn object at all: every prediction goes through the shared FlatForest
+        flat = load_shared_forest(path, flat_root, version)
+        return LoadedModel(version, path, features, flat=flat, flat_max_rows=flat_max_rows, metadata=metadata)
+
+    model = joblib.load(path)
+    flat = FlatForest.from_model(model) if engine == "flat" else None
+    return LoadedModel(version, path, features, model=model, flat=flat, flat_max_rows=flat_max_rows, metadata=metadata)
+
+
+class ModelRegistry:
+    """
+    Keeps the live model and the one before it, and watches `versions_dir`
+    (train.py publishes versions/<version>/price_prediction_model.pkl) for
+    newer artifacts. A new version is loaded and warmed up on a worker
+    thread while the current one keeps serving, then swapped in with a
+    single assignment, so in-flight requests finish on whichever model
+    they started with. `rollback` swaps the previous version back and
+    records the one it replaced in versions/.rolled_back.json; every
+    worker's watcher (and every restart) skips the versions listed there,
+    so a rollback made on one worker reaches all of them within a poll.
+    After a rollback the watcher only moves on to versions published later
+    than the newest rolled-back one, so it never "upgrades" a worker from
+    the version a rollback chose (even the plain artifact) to an older one.
+    """
+
+    def __init__(self, versions_dir, load, poll_seconds=10, on_swap=None):
+        self.versions_dir = versions_dir
+        self.load = load
+        self.poll_seconds = poll_seconds
+        self.on_swap = on_swap
+        self.current = None
+        self.previous = None
+        # Versions that failed to load in this worker; the watcher leaves them alone
+        self.failed = set()
+        # Versions rolled back by any worker, as last read from ROLLBACK_FILE
+        self.rolled_back = set()
+        self.watcher = None
+        self.read_rolled_back()
+
+    @property
+    def skipped(self):
+        return self.failed | self.rolled_back
+
+    @property
+    def rollback_path(self):
+        return os.path.join(self.versions_dir, ROLLBACK_FILE)
+
+    def read_rolled_back(self):
+        try:
+            with open(self.rollback_path, encoding="utf-8") as file:
+                self.rolled_back = set(json.load(file))
+        except FileNotFoundError:
+            self.rolled_back = set()
+        except (OSError, ValueError):
+            logging.exception(f"Couldn't read {self.rollback_path}; keeping the rolled-back versions already known")
+        return self.rolled_back
+
+    def write_rolled_back(self, add=None, discard=None):
+        # Read-modify-write against the file, so rollbacks made by other workers are kept
+        rolled_back = self.read_rolled_back()
+        if add is not None:
+            rolled_back.add(add)
+        rolled_back.discard(discard)
+        os.makedirs(self.versions_dir, exist_ok=True)
+        tmp_path = f"{self.rollback_path}.tmp-{os.getpid()}"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(sorted(rolled_back), file)
+        os.replace(tmp_path, self.rollback_path)
+        self.rolled_back = rolled_back
+
+    def latest_version(self):
+        if not os.path.isdir(self.versions_dir):
+            return None
+        skipped = self.skipped
+        versions = sorted(
+            name for name in os.listdir(self.versions_dir)
+            if not name.startswith(".") and name not in skipped and os.path.exists(self.artifact_path(name))
+        )
+        return versions[-1] if versions else None
+
+    def artifact_path(self, version):
+        return os.path.join(self.versions_dir, version, ARTIFACT_NAME)
+
+    def load_version(self, version, path=None):
+        # Load and warm up; raises if the artifact is broken, without touching the live model
+        start = time.perf_counter()
+        loaded = self.load(path or self.artifact_path(version), version)
+        predictions = loaded.predict(WARMUP_ROWS)
+        if not np.all(np.isfinite(predictions)):
+            raise ValueError(f"Model {version} returned non-finite warm-up predictions")
+        logging.info(f"Loaded model {version} in {time.perf_counter() - start:.2f}s")
+        return loaded
+
+    def activate(self, loaded):
+        self.previous, self.current = self.current, loaded
+        if self.on_swap is not None:
+            self.on_swap(loaded)
+        logging.info(f"Serving model {loaded.version}")
+
+    def rollback(self):
+        if self.previous is None:
+            raise LookupError("No previous model to roll back to")
+        self.write_rolled_back(add=self.current.version, discard=self.previous.version)
+        self.failed.discard(self.previous.version)
+        self.activate(self.previous)
+
+    async def check(self):
+        self.read_rolled_back()
+        if self.current is None:
+            return
+        version = self.latest_version()
+        if self.current.version in self.rolled_back:
+            # Another worker rolled back the version served here; follow it to the version it kept
+            if self.previous is not None and self.previous.version not in self.skipped:
+                self.activate(self.previous)
+                return
+        elif version is not None and version < max(self.rolled_back, default=""):
+            # Published before the newest rolled-back version: a rollback already chose what to serve,
+            # and only a newer publish replaces that choice
+            return
+        if version is None or version == self.current.version:
+            return
+        if self.previous is not None and version == self.previous.version:
+            self.activate(self.previous)
+            return
+        try:
+            loaded = await asyncio.to_thread(self.load_version, version)
+        except Exception:
+            logging.exception(f"Couldn't load model {version}; keeping {self.current.version}")
+            self.failed.add(version)
+            return
+        self.activate(loaded)
+
+    async def watch(self):
+        while True:
+            await asyncio.sleep(self.poll_seconds)
+            await self.check()
+
+    def start(self):
+        if self.poll_seconds > 0 and self.watcher is None:
+            self.watcher = asyncio.create_task(self.watch())
+
+    async def stop(self):
+        if self.watcher is not None:
+            self.watcher.cancel()
+            try:
+                await self.watcher
+            except asyncio.CancelledError:
+                pass
+            self.watcher = None
+
+    def status(self):
+        def describe(loaded):
+            if loaded is None:
+                return None
+            return {
+                "version": loaded.version,
+                "path": loaded.path,
+                "loaded_at": loaded.loaded_at,
+                "metrics": loaded.metadata.get("metrics"),
+            }
+
+        return {
+            "current": describe(self.current),
+            "previous": describe(self.previous),
+            "watching": self.versions_dir if self.watcher is not None else None,
+            "poll_seconds": self.poll_seconds,
+            "rolled_back": sorted(self.rolled_back),
+            "failed": sorted(self.failed),
+        }
@@ -1,8 +1,8 @@
 import streamlit as st
 from streamlit_extras.app_logo import add_logo
+from streamlit_searchbox import st_searchbox
 from sidebar import display_sidebar
 import requests
-import json
 
 
 st.markdown("""
@@ -32,6 +32,7 @@ st.markdown("""
 
 # FastAPI backend URL
 API_URL = "http://127.0.0.1:8000/predict_price/"
+LOCATIONS_URL = "http://127.0.0.1:8000/locations"
 
 # Streamlit App Title
 st.title("🏡 Property Price Prediction Tool")
@@ -41,14 +42,23 @@ prediction_placeholder = st.empty()
 
 display_sidebar()
 
-with open("locations.json", "r") as file:
-    location_data = json.load(file)
+# Typeahead: the backend's location index is queried as the user types; repeated prefixes come from the cache
+@st.cache_data(ttl=600, show_spinner=False)
+def fetch_locations(query):
+    response = requests.get(LOCATIONS_URL, params={"q": query, "limit": 10}, timeout=5)
+    response.raise_for_status()
+    return [loc["location"] for loc in response.json()]
 
-location_map = {loc["location"]: loc["location_code"] for loc in location_data}
-location_names = list(location_map.keys())
+def search_locations(query):
+    if not query or not query.strip():
+        return []
+    try:
+        return fetch_locations(query.strip())
+    except requests.RequestException:
+        # Not cached, so the next keystroke tries the backend again
+        return []
 
-location_name = st.selectbox("🔍 Search & Select Location", options=location_names)
-location_code = location_map[location_name] 
+location_name = st_searchbox(search_locations, placeholder="🔍 Search & Select Location", key="location_search")
 
 sqm = st.number_input("Enter Property Size (sqm)", min_value=0.0, step=10.0)
 bedrooms = st.slider("Number of Bedrooms", 1, 10, 3)
@@ -58,10 +68,13 @@ furnishing_code = st.radio("Furnishing Type", ["Unfurnished", "Semi-Furnished",
 furnishing_map = {"Unfurnished": 0, "Semi-Furnished": 1, "Furnished": 2}
 furnishing = furnishing_map[furnishing_code]
 
-if st.button("🔮 Predict Price"):
+predict = st.button("🔮 Predict Price")
+if predict and not location_name:
+    prediction_placeholder.warning("Please search for and select a location first.")
+elif predict:
     
     data = {
-        "location_code": location_code,
+        "location": location_name,
         "sqm": sqm,
         "bathrooms": bathrooms,
         "bedrooms": bedrooms,
@@ -0,0 +1,67 @@
+import json
+import os
+
+
+class Checkpoint:
+    """
+    Progress of a paged crawl: the highest page handled, the pages that still
+    failed after all retries and the rows already flushed to disk. Callers
+    save it only right after their writer has flushed, so the file on disk
+    never claims pages whose rows are still sitting in a buffer.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.last_completed_page = 0
+        self.failed_pages = []
+        self.rows_flushed = 0
+        self.files = []
+        self.finished = False
+
+    @classmethod
+    def load(cls, path):
+        checkpoint = cls(path)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as file:
+                state = json.load(file)
+            checkpoint.last_completed_page = state.get("last_completed_page", 0)
+            checkpoint.failed_pages = state.get("failed_pages", [])
+            checkpoint.rows_flushed = state.get("rows_flushed", 0)
+            checkpoint.files = state.get("files", [])
+            checkpoint.finished = state.get("finished", False)
+        return checkpoint
+
+    def save(self):
+        state = {
+            "last_completed_page": self.last_completed_page,
+            "failed_pages": sorted(self.failed_pages),
+            "rows_flushed": self.rows_flushed,
+            "files": self.files,
+            "finished": self.finished,
+        }
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(state, file, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def pending_pages(self, max_pages):
+        # Failed pages are re-queued first, then the crawl carries on where it stopped
+        pages = sorted(self.failed_pages)
+        if not self.finished:
+            pages.extend(range(self.last_completed_page + 1, max_pages + 1))
+        return pages
+
+    def complete_page(self, page):
+        if page in self.failed_pages:
+            self.failed_pages.remove(page)
+        self.last_completed_page = max(self.last_completed_page, page)
+
+    def fail_page(self, page):
+        if page not in self.failed_pages:
+            self.failed_pages.append(page)
+        self.last_completed_page = max(self.last_completed_page, page)
+
+    def record_flush(self, writer, rows_before):
+        self.rows_flushed = rows_before + writer.rows_written
+        self.files = sorted(set(self.files) | set(writer.files))
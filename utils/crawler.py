@@ -0,0 +1,78 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+
+class TokenBucket:
+    # Refills `rate` tokens per second up to `capacity`; each request takes one token.
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class HostRateLimiter:
+    # One token bucket per host, so every worker thread shares the same budget for a site.
+    def __init__(self, requests_per_second, burst=None):
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def wait(self, url):
+        host = urlsplit(url).netloc
+        with self.lock:
+            bucket = self.buckets.get(host)
+            if bucket is None:
+                bucket = self.buckets[host] = TokenBucket(self.requests_per_second, self.burst)
+        bucket.acquire()
+
+
+def crawl_pages(fetch_page, pages, concurrency=8):
+    """
+    Run fetch_page(page) for every page on a thread pool, keeping up to
+    `concurrency` requests in flight, and yield (page, result) in the order
+    the pages were given. Results that finish early are held back until the
+    pages before them are done, so callers can keep their per-page logic
+    (dedup, stop rules) sequential. Breaking out of the loop cancels the
+    pages that have not started yet.
+    """
+    pages = iter(pages)
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    pending = deque()
+
+    try:
+        for page in pages:
+            pending.append((page, executor.submit(fetch_page, page)))
+            if len(pending) >= concurrency * 2:
+                break
+
+        while pending:
+            page, future = pending.popleft()
+            result = future.result()
+
+            next_page = next(pages, None)
+            if next_page is not None:
+                pending.append((next_page, executor.submit(fetch_page, next_page)))
+
+            yield page, result
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
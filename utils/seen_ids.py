@@ -0,0 +1,140 @@
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+# Integers written the way str(int) writes them; "0123" or "-0" would collide with another ID's key
+CANONICAL_INT = r"(?:0|-?[1-9]\d{0,17})"
+
+
+class SeenIdIndex:
+    """
+    Advert IDs that have already been scraped, stored on disk as a sorted
+    int64 array (`<path>.npy`, memory-mapped on load) plus an append-only
+    log of int64s (`<path>.log`) holding the IDs added since the last
+    compaction. Loading costs a mmap and one read of the small log, lookups
+    are a set probe followed by a binary search, and appends only write the
+    new IDs. The rare ID that isn't an integer is kept in a plain set,
+    backed by a text file with one ID per line (`<path>.other`).
+    """
+
+    def __init__(self, path, compact_threshold=100_000):
+        self.base_path = f"{path}.npy"
+        self.log_path = f"{path}.log"
+        self.other_path = f"{path}.other"
+        self.compact_threshold = compact_threshold
+        self.pending = []
+        self.pending_other = []
+
+        if os.path.exists(self.base_path):
+            self.base = np.load(self.base_path, mmap_mode="r")
+        else:
+            self.base = np.empty(0, dtype=np.int64)
+
+        if os.path.exists(self.log_path):
+            self.recent = set(np.fromfile(self.log_path, dtype=np.int64).tolist())
+        else:
+            self.recent = set()
+
+        if os.path.exists(self.other_path):
+            with open(self.other_path, encoding="utf-8") as file:
+                self.other = set(file.read().splitlines())
+        else:
+            self.other = set()
+
+    @staticmethod
+    def parse(ad_id):
+        # The int64 key for an integer ID ("123", 123), or None for anything else (including "0123")
+        text = str(ad_id).strip()
+        if not re.fullmatch(CANONICAL_INT, text):
+            return None
+        return int(text)
+
+    @staticmethod
+    def exists(path):
+        return os.path.exists(f"{path}.npy")
+
+    @staticmethod
+    def read_csv_ids(csv_files):
+        # Only the id column of each data_*.csv chunk is read
+        ids = []
+        for file in csv_files:
+            try:
+                ids.append(pd.read_csv(file, usecols=["id"], dtype={"id": str})["id"].dropna().to_numpy())
+            except Exception as e:
+                print(f"Warning: Could not read {file}. Error: {e}")
+        return ids
+
+    @classmethod
+    def from_ids(cls, path, id_arrays):
+        # One-off (re)build of the index from every ID already on disk
+        ids = pd.Series(np.concatenate([np.asarray(ids, dtype=object) for ids in id_arrays]) if id_arrays else [], dtype=object)
+        ids = ids.dropna().astype(str).str.strip()
+        numeric = ids.str.fullmatch(CANONICAL_INT)
+        base = np.unique(ids[numeric].astype(np.int64).to_numpy())
+        cls._write_base(f"{path}.npy", base)
+        for suffix in (".log", ".other"):
+            if os.path.exists(f"{path}{suffix}"):
+                os.remove(f"{path}{suffix}")
+        other = sorted(set(ids[~numeric]))
+        if other:
+            with open(f"{path}.other", "w", encoding="utf-8") as file:
+                file.writelines(f"{ad_id}\n" for ad_id in other)
+        return cls(path)
+
+    @staticmethod
+    def _write_base(base_path, base):
+        os.makedirs(os.path.dirname(base_path) or ".", exist_ok=True)
+        tmp_path = f"{base_path}.tmp.npy"
+        np.save(tmp_path, base.astype(np.int64))
+        os.replace(tmp_path, base_path)
+
+    def __len__(self):
+        return len(self.base) + len(self.recent) + len(self.other)
+
+    def __contains__(self, ad_id):
+        value = self.parse(ad_id)
+        if value is None:
+            return str(ad_id).strip() in self.other
+
+        if value in self.recent:
+            return True
+        i = np.searchsorted(self.base, value)
+        return i < len(self.base) and self.base[i] == value
+
+    def update(self, ad_ids):
+        # Visible to lookups straight away; written to the log on the next flush()
+        for ad_id in ad_ids:
+            if ad_id in self:
+                continue
+            value = self.parse(ad_id)
+            if value is None:
+                self.other.add(str(ad_id).strip())
+                self.pending_other.append(str(ad_id).strip())
+                continue
+            self.recent.add(value)
+            self.pending.append(value)
+
+    def flush(self):
+        if self.pending:
+            with open(self.log_path, "ab") as file:
+                np.asarray(self.pending, dtype=np.int64).tofile(file)
+            self.pending = []
+        if self.pending_other:
+            with open(self.other_path, "a", encoding="utf-8") as file:
+                file.writelines(f"{ad_id}\n" for ad_id in self.pending_other)
+            self.pending_other = []
+
+        if len(self.recent) >= self.compact_threshold:
+            self.compact()
+
+    def compact(self):
+        # Merge the log into the sorted base array and start a fresh log
+        recent = np.fromiter(self.recent, dtype=np.int64, count=len(self.recent))
+        self._write_base(self.base_path, np.union1d(np.asarray(self.base), recent))
+        if os.path.exists(self.log_path):
+            os.remove(self.log_path)
+        self.base = np.load(self.base_path, mmap_mode="r")
+        self.recent = set()
+        self.pending = []
@@ -0,0 +1,215 @@
+import csv
+import os
+import time
+import uuid
+
+
+def new_run_id():
+    # Timestamp for ordering, plus pid and a random tag so runs started in the same second never share files
+    return f"{time.strftime('%Y%m%d%H%M%S')}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+
+class CsvWriter:
+    # Buffers rows and appends them to a single CSV file, writing the header once
+    def __init__(self, path, fieldnames, batch_size=500):
+        self.path = path
+        self.fieldnames = fieldnames
+        self.batch_size = batch_size
+        self.buffer = []
+        self.rows_written = 0
+
+    def write_rows(self, rows):
+        # Returns the number of rows flushed to disk by this call (0 if still buffered)
+        self.buffer.extend(rows)
+        if len(self.buffer) >= self.batch_size:
+            return self.flush()
+        return 0
+
+    def flush(self):
+        if not self.buffer:
+            return 0
+
+        write_header = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+        with open(self.path, mode='a', newline='', encoding='utf-8') as file:
+            writer = csv.DictWriter(file, fieldnames=self.fieldnames)
+            if write_header:
+                writer.writeheader()
+            writer.writerows(self.buffer)
+
+        flushed = len(self.buffer)
+        self.rows_written += flushed
+        self.buffer = []
+        return flushed
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class RotatingCsvWriter:
+    """
+    Buffers rows and flushes them in batches of `batch_size` to
+    `{prefix}_{run_id}_{index}.csv` files in `directory`, starting a new file
+    every `rows_per_file` rows. Every run gets its own run id, so it never
+    appends into a chunk file written by an earlier run, and at most one
+    batch is held in memory however long the crawl runs. `transform`, if
+    given, turns each buffered batch into rows just before it is written
+    (one row per item), so raw adverts can be flattened a batch at a time.
+    """
+
+    def __init__(self, directory, prefix, fieldnames, rows_per_file=10_000, batch_size=500, run_id=None, transform=None):
+        self.directory = directory
+        self.prefix = prefix
+        self.fieldnames = fieldnames
+        self.transform = transform
+        self.rows_per_file = rows_per_file
+        self.batch_size = batch_size
+        self.run_id = run_id or new_run_id()
+        self.buffer = []
+        self.files = []
+        self.rows_written = 0
+        self.current = None
+
+        os.makedirs(directory, exist_ok=True)
+
+    def _next_file(self):
+        path = os.path.join(self.directory, f"{self.prefix}_{self.run_id}_{len(self.files)}.csv")
+        self.files.append(path)
+        self.current = CsvWriter(path, self.fieldnames, batch_size=self.rows_per_file)
+
+    def write_rows(self, rows):
+        # Returns the number of rows flushed to disk by this call (0 if still buffered)
+        self.buffer.extend(rows)
+        if len(self.buffer) >= self.batch_size:
+            return self.flush()
+        return 0
+
+    def flush(self):
+        flushed = 0
+        if self.buffer and self.transform:
+            self.buffer = list(self.transform(self.buffer))
+
+        while self.buffer:
+            if self.current is None or self.current.rows_written >= self.rows_per_file:
+                self._next_file()
+
+            space = self.rows_per_file - self.current.rows_written
+            batch, self.buffer = self.buffer[:space], self.buffer[space:]
+            self.current.write_rows(batch)
+            flushed += self.current.flush()
+
+        self.rows_written += flushed
+        return flushed
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class ParquetDatasetWriter:
+    """
+    Buffers rows and writes them as Parquet into a hive-partitioned dataset,
+    `root/crawl_date=YYYY-MM-DD/region=<region>/part-<run_id>-<batch>-<n>.parquet`,
+    converting every batch to the explicit `schema` (which must include the
+    partition columns). `transform`, if given, turns each buffered batch into
+    a DataFrame or a list of row dicts before it is written. Same interface
+    as RotatingCsvWriter, so the scrapers and Checkpoint can use either.
+    """
+
+    def __init__(self, root, schema, partition_cols=("crawl_date", "region"), batch_size=5000, run_id=None, transform=None):
+        import pyarrow  # noqa: F401  (fail early if the parquet extra isn't installed)
+
+        self.root = root
+        self.schema = schema
+        self.partition_cols = list(partition_cols)
+        self.batch_size = batch_size
+        self.run_id = run_id or new_run_id()
+        self.transform = transform
+        self.buffer = []
+        self.files = []
+        self.rows_written = 0
+        self.batches = 0
+
+        os.makedirs(root, exist_ok=True)
+
+    def write_rows(self, rows):
+        # Returns the number of rows flushed to disk by this call (0 if still buffered)
+        self.buffer.extend(rows)
+        if len(self.buffer) >= self.batch_size:
+            return self.flush()
+        return 0
+
+    def flush(self):
+        import pandas as pd
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if not self.buffer:
+            return 0
+
+        rows = self.transform(self.buffer) if self.transform else self.buffer
+        # The API sends some values (mileage, phone numbers, sizes) as numbers; string columns store their text
+        strings = [field.name for field in self.schema if _is_string(field.type)]
+        if isinstance(rows, pd.DataFrame):
+            rows = rows.assign(**{name: rows[name].astype("string") for name in strings if name in rows})
+            table = pa.Table.from_pandas(rows, schema=self.schema, preserve_index=False)
+        else:
+            rows = [{name: str(value) if name in strings and value is not None else value for name, value in row.items()} for row in rows]
+            table = pa.Table.from_pylist(rows, schema=self.schema)
+
+        pq.write_to_dataset(
+            table,
+            self.root,
+            partition_cols=self.partition_cols,
+            basename_template=f"part-{self.run_id}-{self.batches}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+            file_visitor=lambda written: self.files.append(written.path),
+        )
+
+        self.batches += 1
+        self.rows_written += table.num_rows
+        self.buffer = []
+        return table.num_rows
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def _is_string(data_type):
+    import pyarrow as pa
+
+    if pa.types.is_dictionary(data_type):
+        data_type = data_type.value_type
+    return pa.types.is_string(data_type) or pa.types.is_large_string(data_type)
+
+
+def read_listings(root, schema, columns=None, filters=None, partition_cols=("crawl_date", "region")):
+    """
+    Load a partitioned listings dataset into a DataFrame with the dataset's
+    schema. Only the requested `columns` are read, and `filters` (pyarrow
+    DNF style, e.g. [("region", "=", "Lagos"), ("crawl_date", ">=", date(2025, 3, 1))])
+    prune whole partitions before any file is opened.
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+
+    partitioning = ds.partitioning(pa.schema([schema.field(name) for name in partition_cols]), flavor="hive")
+    table = pq.read_table(root, columns=columns, filters=filters, schema=schema, partitioning=partitioning)
+    return table.to_pandas()
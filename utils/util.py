@@ -1,27 +1,132 @@
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup, SoupStrainer
 import csv
+import hashlib
+import json
+import os
+import threading
 
-def fetch_and_parse(url):
+HTTP_CACHE_DIR = os.getenv("HTTP_CACHE_DIR", "./data/http_cache")
+
+# BeautifulSoup tree builder: "html.parser" (stdlib), "lxml" (much faster) or "html5lib"
+HTML_PARSER = os.getenv("HTML_PARSER", "html.parser")
+
+HTML_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/112.0.0.0 Safari/537.36",
+    "Accept-Language": "en-US,en;q=0.9",
+    "Accept-Encoding": "gzip, deflate",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+}
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_session(pool_size=16):
+    # One keep-alive session per process, shared by every scraper and thread
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+    return _session
+
+def _cache_paths(url):
+    key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+    return os.path.join(HTTP_CACHE_DIR, f"{key}.body"), os.path.join(HTTP_CACHE_DIR, f"{key}.json")
+
+def _write_atomic(path, data):
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as file:
+        file.write(data)
+    os.replace(tmp_path, path)
+
+def _load_cached(url):
+    body_path, meta_path = _cache_paths(url)
+    if not (os.path.exists(body_path) and os.path.exists(meta_path)):
+        return None, None
+    try:
+        with open(meta_path, encoding="utf-8") as file:
+            return body_path, json.load(file)
+    except (OSError, ValueError):
+        return None, None
+
+def _store_cached(url, response):
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    if not (etag or last_modified):
+        return
+
+    body_path, meta_path = _cache_paths(url)
+    os.makedirs(HTTP_CACHE_DIR, exist_ok=True)
+    # Body first, so a meta file never points at a missing body
+    _write_atomic(body_path, response.text.encode("utf-8"))
+    meta = {"url": url, "etag": etag, "last_modified": last_modified}
+    _write_atomic(meta_path, json.dumps(meta).encode("utf-8"))
+
+def get(url, headers=None, timeout=10, use_cache=True):
+    """
+    GET a url through the shared session and return the body text.
+    Responses carrying an ETag or Last-Modified are kept in HTTP_CACHE_DIR and
+    revalidated with If-None-Match/If-Modified-Since, so an unchanged page
+    costs a 304 instead of a full download. Raises requests' RequestException.
+    """
+    headers = dict(headers or {})
+    body_path, meta = _load_cached(url) if use_cache else (None, None)
+
+    if meta:
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+    response = get_session().get(url, headers=headers, timeout=timeout)
+
+    if response.status_code == 304 and meta:
+        with open(body_path, encoding="utf-8") as file:
+            return file.read()
+
+    response.raise_for_status()
+    if use_cache:
+        _store_cached(url, response)
+    return response.text
+
+def get_json(url, headers=None, timeout=10, use_cache=True):
+    text = get(url, headers=headers, timeout=timeout, use_cache=use_cache)
+    try:
+        return json.loads(text)
+    except ValueError as e:
+        raise requests.exceptions.InvalidJSONError(f"Invalid JSON from {url}: {e}")
+
+def listing_strainer(class_name):
+    # Only build tree nodes for the listing cards; everything else on the page is skipped
+    return SoupStrainer(class_=class_name)
+
+def make_soup(html, parser=None, parse_only=None):
+    return BeautifulSoup(html, parser or HTML_PARSER, parse_only=parse_only)
+
+def fetch_html(url):
     print(f"baseurl: {url}")
     try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/112.0.0.0 Safari/537.36",
-            "Accept-Language": "en-US,en;q=0.9",
-            "Accept-Encoding": "gzip, deflate",
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-        }
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
+        html = get(url, headers=HTML_HEADERS)
         print("Site connection established..")
-        try:
-            return BeautifulSoup(response.text, 'html.parser')
-        except:
-            return None
+        return html
     except requests.exceptions.RequestException as e:
         print(f"Failed to retrieve data from {url}: {e}")
         return None
 
+def fetch_and_parse(url, parser=None, parse_only=None):
+    html = fetch_html(url)
+    if html is None:
+        return None
+    try:
+        return make_soup(html, parser, parse_only)
+    except:
+        return None
+
 def save_to_csv(data, filename, fieldnames):
     with open(filename, mode='w', newline='', encoding='utf-8') as file:
         writer = csv.DictWriter(file, fieldnames=fieldnames)